@@ -0,0 +1,67 @@
+"""
+Benchmark of text_tools.extMainTree with and without the PageTemplate of a site, on
+pages of one site that share a mega menu, a footer of link lists and their styles,
+around an article and a list of related stories of their own. The template learns
+from the first pages, and the later ones are timed: density calculation only, and
+parsing plus extraction.
+
+Usage: python benchmarks/boilerplate.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import text_tools
+
+WORDS = ['sleep', 'hours', 'study', 'effect', 'people', 'night', 'council', 'experiment']
+
+
+def site_page(seed, paragraphs):
+    """A page of the site, with the chrome of every page and an article of paragraphs of its own."""
+    rnd = random.Random(seed)
+    menu = ''.join('<div class="menu-column"><h3>Section %d</h3><ul>%s</ul></div>' % (
+        n, ''.join('<li class="menu-entry"><a href="/section/%d/topic/%d" class="menu-link" data-track="menu-%d-%d">'
+                   'Topic %d</a></li>' % (n, m, n, m, m) for m in xrange(20))) for n in xrange(15))
+    footer = ''.join('<div class="footer-links"><ul>%s</ul></div>' % ''.join(
+        '<li><a href="/about/%d/%d" rel="nofollow">About %d</a></li>' % (n, m, m) for m in xrange(10))
+        for n in xrange(8))
+    article = ''.join('<p>%s.</p>' % ' '.join(rnd.choice(WORDS) for _ in xrange(rnd.randint(20, 80)))
+                      for _ in xrange(paragraphs))
+    related = ''.join('<div class="teaser"><a href="/story/%d" class="teaser-link">%s</a></div>' % (
+        rnd.randint(0, 10 ** 6), rnd.choice(WORDS)) for _ in xrange(10))
+    style = ' '.join('.c%d { margin: %dpx }' % (n, n % 7) for n in xrange(500))
+    return (u'<html><head><title>News</title><style>%s</style></head><body>'
+            u'<div class="page"><div class="header"><nav class="mega-menu">%s</nav></div>'
+            u'<div class="main"><div class="article"><h1>Headline %d</h1>%s</div>'
+            u'<div class="related">%s</div></div>'
+            u'<div class="footer">%s</div></div></body></html>' % (style, menu, seed, article, related, footer))
+
+
+if __name__ == '__main__':
+    pages = [site_page(seed, 10 + seed % 20) for seed in xrange(60)]
+    parser = text_tools.HtmlParser('lxml')
+    template = text_tools.PageTemplate()
+    for html in pages[:20]:
+        text_tools.extMainTree(html, parser=parser, template=template)
+    pages = pages[20:]
+    same = sum(text_tools.get_tree_text(text_tools.extMainTree(html, parser=parser)) ==
+               text_tools.get_tree_text(text_tools.extMainTree(html, parser=parser, template=template))
+               for html in pages)
+    print 'Known boilerplate branches: %d, same main text: %d of %d pages' % (
+        sum(1 for entries in template.paths.itervalues() for count, _ in entries.itervalues()
+            if count >= template.minSeen), same, len(pages))
+
+    roots = [parser.parse(html) for html in pages]
+    print '{0:>22} {1:>12} {2:>14} {3:>10}'.format('', 'former (s)', 'template (s)', 'speedup')
+    for name, before, after in (
+            ('density', lambda: [text_tools._calcDensityBottomUp(root) for root in roots],
+             lambda: [text_tools._calcDensityBottomUp(root, template) for root in roots]),
+            ('parse and extract', lambda: [text_tools.extMainTree(html, parser=parser) for html in pages],
+             lambda: [text_tools.extMainTree(html, parser=parser, template=template) for html in pages])):
+        before = min(timeit.repeat(before, number=1, repeat=3))
+        after = min(timeit.repeat(after, number=1, repeat=3))
+        print '{0:>22} {1:>12.4f} {2:>14.4f} {3:>9.1f}x'.format(name, before, after, before / after)
@@ -0,0 +1,70 @@
+"""
+Benchmark of text_tools._calcDensityBottomUp against text_tools._calcDensity, which
+serializes every branch of the page, on news-like pages of 20 to 320 paragraphs
+nested in 5 to 40 wrapper <div>s.
+
+Usage: python benchmarks/density.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import lxml.html.soupparser
+
+import text_tools
+
+
+def news_page(paragraphs, depth, seed=0, indent=False):
+    """
+    A page with a menu, an article of paragraphs inside depth <div>s, a sidebar, styles
+    and scripts. With indent the wrapper <div>s are on lines of their own.
+    """
+    rnd = random.Random(seed)
+    words = ['sleep', 'hours', 'study', 'effect', 'people', 'night', 'council', 'experiment']
+    menu = ''.join('<li><a href="/section/%d" class="menu-item">Section %d</a></li>' % (n, n) for n in xrange(12))
+    article = []
+    for n in xrange(paragraphs):
+        sentence = ' '.join(rnd.choice(words) for _ in xrange(rnd.randint(20, 80)))
+        article.append('<p>%s <a href="/story/%d">%s</a> &amp; <em>%s</em>.</p>' % (
+            sentence, n, rnd.choice(words), rnd.choice(words)))
+        if n % 10 == 9:
+            article.append('<div class="ad"><script>show_ad(%d);</script></div><!-- ad %d -->' % (n, n))
+    body = '<div class="story"><h1>Headline</h1>%s</div>' % ''.join(article)
+    for level in xrange(depth):
+        body = ('<div class="wrap-%d">\n%s\n</div>' if indent else '<div class="wrap-%d">%s</div>') % (level, body)
+    sidebar = ''.join('<div class="teaser"><a href="/more/%d">More %d</a> %s</div>' % (n, n, rnd.choice(words))
+                      for n in xrange(20))
+    # Inline styles and page state, some tens of kilobytes as on most news sites:
+    style = ' '.join('.c%d { margin: %dpx }' % (n, n % 7) for n in xrange(1000))
+    state = '{%s}' % ', '.join('"story%d": {"id": %d, "title": "%s"}' % (n, n, rnd.choice(words)) for n in xrange(1000))
+    return (u'<html><head><title>News</title><style>%s</style></head><body>'
+            u'<ul class="menu">%s</ul>%s<div class="sidebar">%s</div>'
+            u'<script>window.__STATE__ = %s;</script></body></html>' % (style, menu, body, sidebar, state))
+
+
+def timed(calc, html):
+    """Best of three runs of calc, each on a fresh tree, because _calcDensity changes it."""
+    times = []
+    for _ in xrange(3):
+        root = lxml.html.soupparser.fromstring(html)
+        times.append(min(timeit.repeat(lambda: calc(root), number=1, repeat=1)))
+    return min(times)
+
+
+def numbers(densDic):
+    return (densDic['self'][:3], [numbers(childDic) for childDic in densDic.get('child', [])])
+
+
+if __name__ == '__main__':
+    print '{0:>7} {1:>6} {2:>12} {3:>12} {4:>10}'.format('paras', 'depth', 'former (s)', 'one pass (s)', 'speedup')
+    for paragraphs, depth in ((20, 5), (80, 10), (320, 10), (320, 20), (320, 40)):
+        html = news_page(paragraphs, depth)
+        assert numbers(text_tools._calcDensity(lxml.html.soupparser.fromstring(html))) == \
+            numbers(text_tools._calcDensityBottomUp(lxml.html.soupparser.fromstring(html)))
+        before = timed(text_tools._calcDensity, html)
+        after = timed(text_tools._calcDensityBottomUp, html)
+        print '{0:>7} {1:>6} {2:>12.4f} {3:>12.4f} {4:>9.1f}x'.format(paragraphs, depth, before, after, before / after)
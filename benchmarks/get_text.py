@@ -0,0 +1,59 @@
+"""
+Benchmark of text_tools._get_text against the former recursive get_text, which
+concatenated the text of every branch again at each level, on the news-like pages of
+benchmarks/density.py nested in 10 to 2000 indented wrapper <div>s. The former one fails with a
+RuntimeError on the deepest pages, because of the recursion limit.
+
+Usage: python benchmarks/get_text.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import lxml.html
+
+import text_tools
+from density import news_page
+
+
+def former_get_text(tree):
+    """The former implementation of the recursive _get_text of text_tools.get_text"""
+    tags_to_ignore = ["head", "style", "script", "noscript", "<built-in function comment>", "option"],
+    tags_in_newline = ["p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "br", "li"]
+    text = ''
+    tag = str(tree.tag).lower()
+    if (tag == '<built-in function comment>' or
+                tag == 'style' or
+                tag == 'script' or
+                tag == 'noscript' or
+                str(tree.tag).lower() in tags_to_ignore):
+        return tree.tail if tree.tail != None else ''
+    if tree.text != None:
+        text += tree.text
+    for child in tree:
+        text += former_get_text(child)
+    if str(tree.tag).lower() in tags_in_newline:
+        text += '\n'
+    if tree.tail != None:
+        text += tree.tail
+    return text
+
+
+if __name__ == '__main__':
+    print '{0:>7} {1:>6} {2:>12} {3:>12} {4:>10}'.format('paras', 'depth', 'former (s)', 'stack (s)', 'speedup')
+    # The native parser, because soupparser itself recurses on every level, without its depth limit:
+    parser = lxml.html.HTMLParser(huge_tree=True)
+    for paragraphs, depth in ((320, 10), (320, 100), (1280, 100), (1280, 500), (1280, 2000)):
+        root = lxml.html.document_fromstring(news_page(paragraphs, depth, indent=True), parser=parser)
+        try:
+            before = min(timeit.repeat(lambda: former_get_text(root), number=1, repeat=3))
+        except RuntimeError:
+            before = None
+        after = min(timeit.repeat(lambda: text_tools._get_text(root), number=1, repeat=3))
+        if before != None:
+            print '{0:>7} {1:>6} {2:>12.4f} {3:>12.4f} {4:>9.1f}x'.format(paragraphs, depth, before, after, before / after)
+        else:
+            print '{0:>7} {1:>6} {2:>12} {3:>12.4f} {4:>10}'.format(paragraphs, depth, 'recursion', after, '-')
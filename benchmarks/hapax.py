@@ -0,0 +1,41 @@
+"""
+Benchmark of the removal of the words that appear once in a document (Preprocess.remove_rare)
+against the former sum() / list.count() implementation, on TheFinger repeated 1 to 16 times.
+
+Usage: python benchmarks/hapax.py
+"""
+
+import codecs
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from preprocess import Preprocess
+
+
+def count_hapax(tokens):
+    """The former implementation of Preprocess.stem"""
+    all_tokens = sum(tokens, [])
+    tokens_once = set(token for token in set(all_tokens) if all_tokens.count(token) == 1)
+    return [[token for token in sentence if token not in tokens_once]
+            for sentence in tokens]
+
+
+if __name__ == '__main__':
+    text = codecs.open(os.path.join(os.path.dirname(__file__), '..', 'TheFinger'), encoding='utf-8').read()
+    ppd = Preprocess(text, min_count=0)
+    stemmed = ppd.dictionary_text
+    ppd.min_count = 2
+
+    print '{0:>7} {1:>8} {2:>12} {3:>12} {4:>10}'.format('copies', 'tokens', 'count (s)', 'Counter (s)', 'speedup')
+    for copies in (1, 2, 4, 8, 16):
+        tokens = stemmed * copies
+        # Keep every copy's tokens distinct, as in a longer document
+        tokens = [[token + str(i // len(stemmed)) for token in sentence] for i, sentence in enumerate(tokens)]
+        assert count_hapax(tokens) == ppd.remove_rare(tokens)
+        before = min(timeit.repeat(lambda: count_hapax(tokens), number=1, repeat=3))
+        after = min(timeit.repeat(lambda: ppd.remove_rare(tokens), number=1, repeat=3))
+        print '{0:>7} {1:>8} {2:>12.4f} {3:>12.4f} {4:>9.1f}x'.format(
+            copies, sum(len(sentence) for sentence in tokens), before, after, before / after)
@@ -0,0 +1,34 @@
+"""
+Benchmark of the streaming html_tools.extract_text against text_tools extMainTree plus
+get_tree_text, which parse the page into a tree first, on the news-like pages of
+benchmarks/density.py, whole and fed to html_tools.iter_paragraphs in 4KB chunks.
+
+Usage: python benchmarks/html_tools.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import html_tools
+import text_tools
+from density import news_page
+
+
+def chunked(html, size=4096):
+    return [html[start:start + size] for start in xrange(0, len(html), size)]
+
+
+if __name__ == '__main__':
+    print '{0:>7} {1:>6} {2:>10} {3:>12} {4:>12} {5:>10}'.format(
+        'paras', 'depth', 'tree (s)', 'stream (s)', 'chunks (s)', 'speedup')
+    for paragraphs, depth in ((20, 5), (80, 10), (320, 10), (320, 40)):
+        html = news_page(paragraphs, depth)
+        tree = min(timeit.repeat(lambda: text_tools.get_tree_text(text_tools.extMainTree(html)), number=1, repeat=3))
+        stream = min(timeit.repeat(lambda: html_tools.extract_text(html), number=1, repeat=3))
+        chunks = chunked(html)
+        streamed = min(timeit.repeat(lambda: list(html_tools.iter_paragraphs(chunks)), number=1, repeat=3))
+        print '{0:>7} {1:>6} {2:>10.4f} {3:>12.4f} {4:>12.4f} {5:>9.1f}x'.format(
+            paragraphs, depth, tree, stream, streamed, tree / stream)
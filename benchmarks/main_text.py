@@ -0,0 +1,91 @@
+"""
+Benchmark of the contiguous children search of text_tools._getMainText against the former
+one, which summed the lengths of every run of children again, on pages with 50 to 800
+sibling <div>s.
+
+Usage: python benchmarks/main_text.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import lxml.html.soupparser
+
+import text_tools
+
+
+def former_getMainText(densDic, threshold):
+    """The former implementation of text_tools._getMainText"""
+    dens, textLen, totalLen, tree = densDic['self']
+    maxChildTrees = []
+    maxChildTreesTextLen = 0
+    if dens >= threshold:
+        maxTree = tree
+        maxTextLen = textLen
+    else:
+        maxTree = None
+        maxTextLen = 0
+        maxChildSubTrees = []
+        maxChildSubTreesTextLen = 0
+        childTreesTmp = []
+        childTreesTmpTextLens = []
+        childTreesTmpTotalLens = []
+        if densDic.has_key('child'):
+            for childDic in densDic['child']:
+                childDens, childTextLen, childTotalLen, childTree = childDic['self']
+                tree, textLen, childTrees, childTreesTextLen = former_getMainText(childDic, threshold)
+                if childTreesTextLen > maxChildSubTreesTextLen:
+                    maxChildSubTrees, maxChildSubTreesTextLen = childTrees, childTreesTextLen
+                childTreesTmp.append(childTree)
+                childTreesTmpTextLens.append(childTextLen)
+                childTreesTmpTotalLens.append(childTotalLen)
+                if textLen > maxTextLen:
+                    maxTree = tree
+                    maxTextLen = textLen
+            for j in range(1, len(childTreesTmp) + 1):
+                for i in range(j):
+                    childTreesTmpTotalLen = sum(childTreesTmpTotalLens[i:j])
+                    childTreesTmpTextLen = sum(childTreesTmpTextLens[i:j])
+                    childTreesTmpTotalLen = 1 if childTreesTmpTotalLen == 0 else childTreesTmpTotalLen
+                    if float(childTreesTmpTextLen) / childTreesTmpTotalLen >= threshold:
+                        if childTreesTmpTextLen > maxChildTreesTextLen:
+                            maxChildTrees = childTreesTmp[i:j]
+                            maxChildTreesTextLen = childTreesTmpTextLen
+            if maxChildSubTreesTextLen > maxChildTreesTextLen:
+                maxChildTrees, maxChildTreesTextLen = maxChildSubTrees, maxChildSubTreesTextLen
+    return (maxTree, maxTextLen, maxChildTrees, maxChildTreesTextLen)
+
+
+def wide_page(width, seed=0):
+    """A page whose body has width <div>s: link menus, short paragraphs and ads."""
+    rnd = random.Random(seed)
+    blocks = []
+    for _ in xrange(width):
+        kind = rnd.random()
+        if kind < 0.4:
+            links = ''.join('<li><a href="/section/%d" class="menu-item">Item %d</a></li>' % (n, n)
+                            for n in xrange(rnd.randint(2, 8)))
+            blocks.append('<div class="menu"><ul>%s</ul></div>' % links)
+        elif kind < 0.8:
+            words = ' '.join(rnd.choice(['sleep', 'hours', 'study', 'effect', 'people', 'night'])
+                             for _ in xrange(rnd.randint(5, 60)))
+            blocks.append('<div><p>%s.</p></div>' % words)
+        else:
+            blocks.append('<div class="ad"><a href="http://ads.example.com/?id=%d"><img src="/ad.png"/></a></div>'
+                          % rnd.randint(0, 1000))
+    return u'<html><head><title>Wide</title></head><body>%s</body></html>' % ''.join(blocks)
+
+
+if __name__ == '__main__':
+    print '{0:>7} {1:>12} {2:>12} {3:>10}'.format('divs', 'former (s)', 'search (s)', 'speedup')
+    for width in (50, 100, 200, 400, 800):
+        for threshold in (0.5,):
+            densDic = text_tools._calcDensity(lxml.html.soupparser.fromstring(wide_page(width)))
+            assert former_getMainText(densDic, threshold) == text_tools._getMainText(densDic, threshold)
+            before = min(timeit.repeat(lambda: former_getMainText(densDic, threshold), number=1, repeat=3))
+            after = min(timeit.repeat(lambda: text_tools._getMainText(densDic, threshold), number=1, repeat=3))
+            print '{0:>7} {1:>12.4f} {2:>12.4f} {3:>9.1f}x'.format(width, before, after, before / after)
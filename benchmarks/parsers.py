@@ -0,0 +1,26 @@
+"""
+Benchmark of the HtmlParser backends of text_tools on the news-like pages of
+benchmarks/density.py: time of parsing plus extMainText, and fallbacks to soupparser.
+
+Usage: python benchmarks/parsers.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import text_tools
+from density import news_page
+
+
+if __name__ == '__main__':
+    pages = [news_page(paragraphs, 10, seed) for seed, paragraphs in enumerate((20, 80, 160, 320) * 5)]
+    print '{0:>8} {1:>10} {2:>12} {3:>10}'.format('parser', 'parse (s)', 'extract (s)', 'fallbacks')
+    for backend in text_tools.PARSERS:
+        parser = text_tools.HtmlParser(backend)
+        seconds = timeit.timeit(lambda: [text_tools.extMainText(page, parser=parser) for page in pages], number=1)
+        report = parser.report()
+        print '{0:>8} {1:>10.4f} {2:>12.4f} {3:>9.0%}'.format(
+            backend, sum(stats['seconds'] for stats in report.values()), seconds, report[backend]['fallbackRate'])
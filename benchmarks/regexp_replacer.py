@@ -0,0 +1,43 @@
+"""
+Benchmark of replacers.regexp.RegexpReplacer against the former one, which called
+re.subn with every rule in turn, on the sentences of the sample documents of the
+repository: one string at a time and a list of sentences at once.
+
+Usage: python benchmarks/regexp_replacer.py
+"""
+
+import os
+import re
+import sys
+import timeit
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root)
+
+from replacers.regexp import RegexpReplacer
+
+
+def former_replace(patterns, sentences):
+    """The former RegexpReplacer.replace of a list of strings"""
+    l = []
+    for s in sentences:
+        for (search_pattern, repl) in patterns:
+            (s, _) = re.subn(search_pattern, repl, s)
+        l.append(s)
+    return l
+
+
+if __name__ == '__main__':
+    sentences = []
+    for name in ('Sleep', 'Brockway.txt', 'TheFinger', 'CaloricRestriction', 'Herrerasaurus', 'SubstanceAbuse'):
+        sentences.extend(line for line in open(os.path.join(root, name)).read().split('.') if line.strip())
+    sentences *= 20
+    replacer = RegexpReplacer()
+    assert replacer.replace(sentences) == former_replace(replacer.patterns, sentences)
+    print '%d sentences, %d with a contraction' % (
+        len(sentences), sum(1 for s in sentences if replacer.replace(s) != s))
+    before = min(timeit.repeat(lambda: former_replace(replacer.patterns, sentences), number=1, repeat=3))
+    one = min(timeit.repeat(lambda: [replacer.replace(s) for s in sentences], number=1, repeat=3))
+    many = min(timeit.repeat(lambda: replacer.replace(sentences), number=1, repeat=3))
+    print '{0:>12} {1:>12} {2:>12}'.format('former (s)', 'one (s)', 'list (s)')
+    print '{0:>12.4f} {1:>12.4f} {2:>12.4f}   {3:.1f}x {4:.1f}x'.format(before, one, many, before / one, before / many)
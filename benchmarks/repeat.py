@@ -0,0 +1,50 @@
+"""
+Benchmark of replacers.repeat.RepeatReplacer with a vocabulary against the former
+recursive replace, which removed one repeated character per regex pass and looked up
+every step, on the words of the sample documents with a vowel repeated 2 to 20 times.
+
+Usage: python benchmarks/repeat.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root)
+
+from replacers.repeat import RepeatReplacer
+
+
+def former_replace(word, vocabulary, repeat_regexp=re.compile(r'(\w*)(\w)\2(\w*)')):
+    """The former recursive RepeatReplacer.replace, with the vocabulary instead of WordNet"""
+    if word in vocabulary:
+        return word
+    repl_word = repeat_regexp.sub(r'\1\2\3', word)
+    if repl_word != word:
+        return former_replace(repl_word, vocabulary)
+    else:
+        return repl_word
+
+
+if __name__ == '__main__':
+    text = ''
+    for name in ('Sleep', 'Brockway.txt', 'TheFinger', 'CaloricRestriction', 'Herrerasaurus', 'SubstanceAbuse'):
+        text += open(os.path.join(root, name)).read()
+    vocabulary = set(re.findall(r'\w+', text.lower()))
+    rnd = random.Random(0)
+    words = []
+    for word in sorted(vocabulary):
+        vowels = [i for i, char in enumerate(word) if char in 'aeiou']
+        if vowels:
+            i = rnd.choice(vowels)
+            words.append(word[:i] + word[i] * rnd.randint(2, 20) + word[i + 1:])
+    replacer = RepeatReplacer(vocabulary=vocabulary)
+    assert [replacer.replace(word) for word in words] == [former_replace(word, vocabulary) for word in words]
+    before = min(timeit.repeat(lambda: [former_replace(word, vocabulary) for word in words], number=1, repeat=3))
+    after = min(timeit.repeat(lambda: [replacer.replace(word) for word in words], number=1, repeat=3))
+    print '%d words, vocabulary of %d words' % (len(words), len(vocabulary))
+    print '{0:>12} {1:>12} {2:>10}'.format('former (s)', 'one pass (s)', 'speedup')
+    print '{0:>12.4f} {1:>12.4f} {2:>9.1f}x'.format(before, after, before / after)
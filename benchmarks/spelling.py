@@ -0,0 +1,67 @@
+"""
+Benchmark of replacers.spelling: bounded_edit_distance against nltk's edit_distance,
+and SymSpellReplacer against a scan of the word list with nltk's edit_distance, on
+the words of the sample documents with one or two random typos, each seen 5 times.
+
+Usage: python benchmarks/spelling.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root)
+
+from nltk.metrics import edit_distance
+
+from replacers.spelling import SymSpellReplacer, bounded_edit_distance
+
+
+def typo(word, rnd):
+    for _ in xrange(rnd.randint(1, 2)):
+        i = rnd.randint(0, len(word) - 1)
+        edit = rnd.choice(('delete', 'insert', 'replace'))
+        char = rnd.choice('abcdefghijklmnopqrstuvwxyz')
+        word = word[:i] + (char if edit != 'delete' else '') + word[i + (edit != 'insert'):]
+    return word
+
+
+def scan_correct(word, words, max_dist=2):
+    """The closest word of the list within max_dist, the first one of the closest, as SymSpellReplacer"""
+    if word in words:
+        return word
+    dist, correction = min((edit_distance(word, known), known) for known in words)
+    return correction if dist <= max_dist else word
+
+
+if __name__ == '__main__':
+    text = ''
+    for name in ('Sleep', 'Brockway.txt', 'TheFinger', 'CaloricRestriction', 'Herrerasaurus', 'SubstanceAbuse'):
+        text += open(os.path.join(root, name)).read()
+    words = sorted(set(re.findall(r'[a-z]{3,}', text.lower())))
+    rnd = random.Random(0)
+    typos = [typo(rnd.choice(words), rnd) for _ in xrange(100)] * 5
+    rnd.shuffle(typos)
+
+    pairs = [(word, known) for word in typos[:20] for known in words]
+    before = min(timeit.repeat(lambda: [edit_distance(a, b) for a, b in pairs], number=1, repeat=3))
+    after = min(timeit.repeat(lambda: [bounded_edit_distance(a, b, 2) for a, b in pairs], number=1, repeat=3))
+    print '%d pairs: edit_distance %.4fs, bounded_edit_distance %.4fs, %.1fx' % (
+        len(pairs), before, after, before / after)
+
+    start = timeit.default_timer()
+    replacer = SymSpellReplacer(words)
+    build = timeit.default_timer() - start
+    word_set = set(words)
+    scan = [scan_correct(word, word_set) for word in typos[:100]]
+    # Ties of the scan go to the first word in alphabetical order, as in the sorted word list:
+    assert scan == [replacer.replace(word) for word in typos[:100]]
+    before = min(timeit.repeat(lambda: [scan_correct(word, word_set) for word in typos[:100]], number=1, repeat=1))
+    lookups = min(timeit.repeat(lambda: [replacer._correct(word) for word in typos[:100]], number=1, repeat=3))
+    cached = min(timeit.repeat(lambda: [replacer.replace(word) for word in typos], number=1, repeat=1))
+    print '%d words indexed in %.4fs under %d deletions' % (len(words), build, len(replacer.index))
+    print '100 typos: scan %.4fs, index %.4fs, %.0fx' % (before, lookups, before / lookups)
+    print '%d typos with the cache: %.4fs (%d hits, %d misses)' % (len(typos), cached, replacer.hits, replacer.misses)
@@ -0,0 +1,58 @@
+"""
+Benchmark of the one scan bracket removal (Preprocess.strip) against the former find() and
+slicing loop, on the sentences of Nadaswaram and on sentences with more and more parentheses.
+
+Usage: python benchmarks/strip.py
+"""
+
+import codecs
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from preprocess import Preprocess, load_sent_tokenizer
+
+
+def find_strip(sentence, start_token='(', end_token=')'):
+    """The former implementation of Preprocess.strip"""
+    while True:
+        start = sentence.find(start_token)
+        if start < 0:
+            break
+        end = sentence.find(end_token) + 1
+        if end < 0:
+            break
+        sentence = sentence[:start] + sentence[end:]
+    return sentence
+
+
+def former(sentences):
+    """
+    The former Preprocess.split_sentences, which ran the () pass twice. A [] pass would
+    never end on Nadaswaram: find_strip() loops forever on a '[' without a ']' after it.
+    """
+    sentences = [find_strip(sentence, '(', ')') for sentence in sentences]
+    return [find_strip(sentence, '(', ')') for sentence in sentences]
+
+
+if __name__ == '__main__':
+    ppd = Preprocess.__new__(Preprocess)
+    text = codecs.open(os.path.join(os.path.dirname(__file__), '..', 'Nadaswaram'), encoding='utf-8').read()
+    sentences = load_sent_tokenizer().tokenize(text)
+    assert former(sentences) == [ppd.strip(sentence, ('()',)) for sentence in sentences]
+    before = min(timeit.repeat(lambda: former(sentences), number=100, repeat=3)) / 100
+    after = min(timeit.repeat(lambda: [ppd.strip(sentence, ('()',)) for sentence in sentences],
+                              number=100, repeat=3)) / 100
+    both = min(timeit.repeat(lambda: [ppd.strip(sentence) for sentence in sentences], number=100, repeat=3)) / 100
+    print 'Nadaswaram, {0} sentences: find () {1:.6f}s, one scan () {2:.6f}s, one scan () and [] {3:.6f}s'.format(
+        len(sentences), before, after, both)
+
+    print '{0:>12} {1:>12} {2:>12}'.format('parentheses', 'find (s)', 'one scan (s)')
+    for count in (10, 100, 1000, 10000):
+        sentence = u'A word (and a note) ' * count
+        assert former([sentence]) == [ppd.strip(sentence)]
+        before = min(timeit.repeat(lambda: find_strip(sentence), number=1, repeat=3))
+        after = min(timeit.repeat(lambda: ppd.strip(sentence), number=1, repeat=3))
+        print '{0:>12} {1:>12.6f} {2:>12.6f}'.format(count, before, after)
@@ -0,0 +1,55 @@
+"""
+Benchmark of replacers.synonyms.MmapWordReplacer against YamlWordReplacer and
+CsvWordReplacer: the time to construct the replacer from a map of 100000 random pairs,
+and to replace the words of the sample documents.
+
+Usage: python benchmarks/wordmap.py
+"""
+
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, root)
+
+import yaml
+
+from replacers.synonyms import CsvWordReplacer, MmapWordReplacer, YamlWordReplacer
+from replacers.wordmap import compile_word_map
+
+if __name__ == '__main__':
+    text = ''
+    for name in ('Sleep', 'Brockway.txt', 'TheFinger', 'CaloricRestriction', 'Herrerasaurus', 'SubstanceAbuse'):
+        text += open(os.path.join(root, name)).read()
+    words = re.findall(r'[a-z]+', text.lower())
+    rnd = random.Random(0)
+    word_map = dict((word, word.upper()) for word in set(words))
+    while len(word_map) < 100000:
+        word_map[''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz') for _ in xrange(rnd.randint(3, 12)))] = 'x'
+
+    tmp = tempfile.mkdtemp()
+    try:
+        yaml_name, csv_name, wmap_name = [os.path.join(tmp, 'words' + ext) for ext in ('.yaml', '.csv', '.wmap')]
+        yaml.safe_dump(word_map, open(yaml_name, 'w'), default_flow_style=False)
+        open(csv_name, 'w').write(''.join('%s,%s\n' % pair for pair in word_map.iteritems()))
+        compile_word_map(word_map, wmap_name)
+
+        replacers = [('yaml', YamlWordReplacer, yaml_name), ('csv', CsvWordReplacer, csv_name),
+                     ('mmap', MmapWordReplacer, wmap_name)]
+        expected = [word_map.get(word, word) for word in words]
+        print '%d pairs, %d words replaced' % (len(word_map), len(words))
+        print '{0:>6} {1:>12} {2:>12}'.format('', 'open (s)', 'replace (s)')
+        for name, cls, fname in replacers:
+            repeat = 1 if cls is YamlWordReplacer else 3
+            start = min(timeit.repeat(lambda: cls(fname), number=1, repeat=repeat))
+            replacer = cls(fname)
+            assert [replacer.replace(word) for word in words] == expected
+            replace = min(timeit.repeat(lambda: [replacer.replace(word) for word in words], number=1, repeat=3))
+            print '{0:>6} {1:>12.6f} {2:>12.4f}'.format(name, start, replace)
+    finally:
+        shutil.rmtree(tmp)
@@ -0,0 +1,207 @@
+"""
+Crawled HTML pages as documents to summarize.
+
+Pages are read from WARC files (.warc or .warc.gz, the response and resource records
+with an HTML payload) or from the .html files of a directory or glob pattern, one at a
+time and without temporary files. The bytes of every page are decoded with the encoding
+that its byte order mark, HTTP header or <meta> tag declares, else UTF-8 if they are
+valid UTF-8, else Windows-1252.
+"""
+
+__author__ = 'Aris Fergadis'
+__version__ = 0.1
+
+import codecs
+import glob
+import gzip
+import logging
+import os
+import re
+import sys
+import zlib
+
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml')
+WARC_EXTENSIONS = ('.warc', '.warc.gz')
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+_boms = [(codecs.BOM_UTF32_LE, 'utf-32-le'), (codecs.BOM_UTF32_BE, 'utf-32-be'), (codecs.BOM_UTF8, 'utf-8'),
+         (codecs.BOM_UTF16_LE, 'utf-16-le'), (codecs.BOM_UTF16_BE, 'utf-16-be')]
+_charset_re = re.compile(r'''charset\s*=\s*["']?\s*([-\w.:]+)''', re.IGNORECASE)
+# Labels that browsers read as a superset of the declared encoding:
+_supersets = {'ascii': 'cp1252', 'iso8859-1': 'cp1252', 'gb2312': 'gb18030', 'gbk': 'gb18030',
+              'euc_kr': 'cp949', 'shift_jis': 'cp932'}
+
+
+def detect_encoding(data, content_type=None, fallback='cp1252'):
+    """
+    Returns the encoding of the html bytes data: the one of its byte order mark, else the
+    charset of the HTTP content_type, else the charset of a <meta> tag in its first 4KB,
+    else UTF-8 if data is valid UTF-8, else fallback.
+    """
+    for bom, encoding in _boms:
+        if data.startswith(bom):
+            return encoding
+    for declaration in (content_type, data[:4096]):
+        match = _charset_re.search(declaration or '')
+        if match is None:
+            continue
+        try:
+            encoding = codecs.lookup(match.group(1)).name
+        except LookupError:
+            continue
+        # A page that declares UTF-16 in itself is read as ASCII, so it is not UTF-16:
+        if encoding.startswith('utf-16') and declaration is not content_type:
+            encoding = 'utf-8'
+        return _supersets.get(encoding, encoding)
+    try:
+        data.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return fallback
+
+
+def decode_html(data, content_type=None):
+    """Returns the html bytes data as unicode, without its byte order mark."""
+    encoding = detect_encoding(data, content_type)
+    for bom, bom_encoding in _boms:
+        if bom_encoding == encoding and data.startswith(bom):
+            data = data[len(bom):]
+            break
+    return data.decode(encoding, 'replace')
+
+
+def iter_warc_records(f):
+    """
+    Yields (headers, content block) for every record of the WARC file object f, with lowercase header names.
+
+    Lines that do not start a record, e.g. after a record whose Content-Length is wrong,
+    are logged and skipped up to the next "WARC/" line.
+    """
+    skipped = 0
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue  # The blank lines that end the previous record
+        if not line.startswith('WARC/'):
+            skipped += 1
+            continue
+        if skipped:
+            logging.warning('Skipped %d lines that are not a WARC record', skipped)
+            skipped = 0
+        headers = {}
+        for line in iter(f.readline, ''):
+            if not line.strip():
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            logging.warning('Skipped WARC record %s: bad Content-Length %r', _record_uri(headers),
+                            headers['content-length'])
+            continue
+        yield headers, f.read(length)
+    if skipped:
+        logging.warning('Skipped %d lines that are not a WARC record', skipped)
+
+
+def _record_uri(headers):
+    return headers.get('warc-target-uri') or headers.get('warc-record-id')
+
+
+def _http_payload(block):
+    """Returns (content type, payload) of the HTTP response block, decoded from chunks and gzip."""
+    head, separator, payload = block.partition('\r\n\r\n')
+    if not separator:
+        head, _, payload = block.partition('\n\n')
+    headers = {}
+    for line in head.splitlines()[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while payload:
+            size, _, payload = payload.partition('\r\n')
+            size = int(size.split(';')[0] or '0', 16)
+            if size == 0:
+                break
+            chunks.append(payload[:size])
+            payload = payload[size + 2:]
+        payload = ''.join(chunks)
+    encoding = headers.get('content-encoding', '').lower()
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        try:
+            # 32 + MAX_WBITS reads a gzip or zlib header, -MAX_WBITS raw deflate:
+            payload = zlib.decompress(payload, 32 + zlib.MAX_WBITS if 'gzip' in encoding else zlib.MAX_WBITS)
+        except zlib.error:
+            payload = zlib.decompress(payload, -zlib.MAX_WBITS)
+    return headers.get('content-type'), payload
+
+
+def iter_warc(f):
+    """
+    Yields (target URI, html) for every HTML response or resource record of the WARC file object f.
+
+    A record whose payload can not be decoded (bad chunk sizes, broken gzip or deflate
+    data) is logged and skipped.
+    """
+    for headers, block in iter_warc_records(f):
+        record_type = headers.get('warc-type')
+        content_type = headers.get('content-type', '')
+        if record_type == 'response' and content_type.startswith('application/http'):
+            try:
+                content_type, payload = _http_payload(block)
+            except (ValueError, zlib.error) as error:
+                logging.warning('Skipped WARC record %s: %s', _record_uri(headers), error)
+                continue
+        elif record_type == 'resource':
+            payload = block
+        else:
+            continue
+        if content_type is None or content_type.split(';')[0].strip().lower() in HTML_TYPES:
+            yield _record_uri(headers), decode_html(payload, content_type)
+
+
+def iter_html_documents(source):
+    """
+    Yields (document id, html) pairs from a source of HTML pages.
+
+    The source may be a WARC file, '-' for a WARC file read from the standard input, or a
+    directory or glob pattern of .html and WARC files. The document id of a page is its
+    file name, or the target URI of its WARC record.
+    """
+    if source == '-':
+        for page in iter_warc(sys.stdin):
+            yield page
+        return
+    if os.path.isdir(source):
+        file_names = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        file_names = glob.glob(source)
+    for file_name in sorted(file_names):
+        if not os.path.isfile(file_name):
+            continue
+        if file_name.lower().endswith(WARC_EXTENSIONS):
+            f = gzip.open(file_name) if file_name.lower().endswith('.gz') else open(file_name, 'rb')
+            try:
+                for page in iter_warc(f):
+                    yield page
+            except (IOError, EOFError, zlib.error) as error:  # A truncated or corrupt .warc.gz
+                logging.warning('Stopped reading %s: %s', file_name, error)
+            f.close()
+        elif file_name.lower().endswith(HTML_EXTENSIONS) or file_name == source:
+            try:
+                html = read_html(file_name)
+            except IOError as error:
+                logging.warning('Skipped %s: %s', file_name, error)
+                continue
+            yield os.path.basename(file_name), html
+
+
+def read_html(file_name):
+    f = open(file_name, 'rb')
+    html = decode_html(f.read())
+    f.close()
+    return html
@@ -1,15 +1,28 @@
 __author__ = 'Aris Fergadis'
 __version__ = 0.1
 
+import argparse
 import codecs
+import glob
+import json
 import logging
+import multiprocessing
+import os
 import sys
+import time
 
 from operator import itemgetter
-from preprocess import Preprocess
+
+import numpy
+from scipy import sparse
+from nltk.stem import PorterStemmer
+from preprocess import Preprocess, StreamPreprocess, CachedStemmer, load_sent_tokenizer, load_tagger
+from idf_model import CorpusIdf, IncrementalIdf
 from gensim import corpora, models
 
-logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s', level=logging.INFO)
+import crawl
+import stopwords
+import text_tools
 
 
 def sentences_length(sentences):
@@ -26,65 +39,518 @@ def sentences_length(sentences):
     return long_len
 
 
-if len(sys.argv) != 3:
-    file_to_open = raw_input("File to open: ")
-    summary_len = raw_input("Extraction length in percent (without %): ")
-else:
-    file_to_open = sys.argv[1]
-    summary_len = sys.argv[2]
-
-# Read article
-f = codecs.open(file_to_open, encoding='utf-8')
-article = f.read()
-f.close()
-
-# Preprocess article
-ppd = Preprocess(article)
-sentences = ppd.sentences
-dictionary_text = ppd.dictionary_text
-
-# Assign a unique integer id to all words appearing in the document
-dictionary = corpora.Dictionary(dictionary_text)
-
-# The function doc2bow() simply counts the number of occurrences of each
-# distinct word, converts the word to its integer word id and returns the
-# result as a sparse vector.
-corpus = [dictionary.doc2bow(sent) for sent in dictionary_text]
-
-# Initialize the tfidf model
-tfidf = models.TfidfModel(corpus)
-corpus_tfidf = tfidf[corpus]
-
-# Remove paragraphs that are too short_len or too long_len
-long_len = sentences_length(sentences)
-sents_2_remove = []
-for sent_id, sent in enumerate(sentences):
-    sent_len = len(sent)
-    if sent_len > long_len:
-        sents_2_remove.append(sent_id)
-
-# Calculate the sentences' score
-sentences_score = []
-for sent_id, doc in enumerate(corpus_tfidf):
-    sent_score = 0
-    if sent_id in sents_2_remove:
-        continue
-    for term_id, term_score in doc:
-        sent_score += term_score
-    sentences_score.append((sent_id, sent_score))
-
-# "Summary" length
-extract_len = int(round(len(sentences) * (int(summary_len)) / 100.0))
-
-# Sort sentences by score in descending order
-sorted_sents_by_score = sorted(sentences_score, key=itemgetter(1), reverse=True)
-# Sort hi score sentences by sentence number as the appear in document_words
-hi_score_sents = sorted(sorted_sents_by_score[:extract_len], key=itemgetter(0))
-
-# Some statistics
-print "Document sentences: {0}".format(len(sentences))
-print "Extraction sentences: {0}\n".format(int(round(len(sentences) * (int(summary_len)) / 100.0)))
-#print document_sents[0]  # print title
-for sent in hi_score_sents:
-    sent_id, _ = sent
-    print sentences[sent_id]
\ No newline at end of file
+def score_sentences(sentences, dictionary_text, idf_model=None):
+    """
+    Returns a list of (sentence id, score) for the sentences that are not too long.
+
+    The score of a sentence is the sum of the tf-idf weights of its terms. The IDF
+    weights come from idf_model, a CorpusIdf, or else are fitted on the sentences.
+    """
+    if idf_model is not None:
+        corpus_tfidf = [idf_model.tfidf(idf_model.doc2bow(sent)) for sent in dictionary_text]
+    else:
+        # Assign a unique integer id to all words appearing in the document
+        dictionary = corpora.Dictionary(dictionary_text)
+
+        # The function doc2bow() simply counts the number of occurrences of each
+        # distinct word, converts the word to its integer word id and returns the
+        # result as a sparse vector.
+        corpus = [dictionary.doc2bow(sent) for sent in dictionary_text]
+
+        # Initialize the tfidf model
+        tfidf = models.TfidfModel(corpus)
+        corpus_tfidf = tfidf[corpus]
+
+    # Remove paragraphs that are too short_len or too long_len
+    long_len = sentences_length(sentences)
+    sents_2_remove = []
+    for sent_id, sent in enumerate(sentences):
+        sent_len = len(sent)
+        if sent_len > long_len:
+            sents_2_remove.append(sent_id)
+
+    # Calculate the sentences' score
+    sentences_score = []
+    for sent_id, doc in enumerate(corpus_tfidf):
+        sent_score = 0
+        if sent_id in sents_2_remove:
+            continue
+        for term_id, term_score in doc:
+            sent_score += term_score
+        sentences_score.append((sent_id, sent_score))
+
+    return sentences_score
+
+
+def sentences_matrix(dictionary_text, dictionary):
+    """Returns the sentence-by-term CSR matrix of the term frequencies of dictionary_text."""
+    indptr = [0]
+    indices = []
+    data = []
+    for sent in dictionary_text:
+        for term_id, tf in dictionary.doc2bow(sent):
+            indices.append(term_id)
+            data.append(tf)
+        indptr.append(len(indices))
+    return sparse.csr_matrix((numpy.array(data, dtype=numpy.float64), numpy.array(indices, dtype=numpy.int32),
+                              numpy.array(indptr, dtype=numpy.int32)), shape=(len(dictionary_text), len(dictionary)))
+
+
+def _row_sums(data, indptr):
+    """
+    Sums the values of every CSR row left to right, the order in which score_sentences()
+    adds them, so that both give bit for bit the same scores and ties.
+    """
+    counts = numpy.diff(indptr)
+    sums = numpy.zeros(len(counts))
+    for k in xrange(counts.max() if len(counts) else 0):
+        rows = numpy.flatnonzero(counts > k)
+        sums[rows] += data[indptr[rows] + k]
+    return sums
+
+
+def score_sentences_sparse(sentences, dictionary_text, idf_model=None):
+    """
+    Returns the arrays (sentence ids, scores) of the sentences that are not too long.
+
+    Same scores as score_sentences(), computed with array operations on a sparse
+    sentence-by-term matrix instead of a loop over every term of every sentence.
+    """
+    if idf_model is not None:
+        matrix = sentences_matrix(dictionary_text, idf_model.dictionary)
+        idfs = numpy.asarray(idf_model.idfs)
+    else:
+        matrix = sentences_matrix(dictionary_text, corpora.Dictionary(dictionary_text))
+        # Document frequency of every term: the number of sentences it appears in
+        dfs = numpy.bincount(matrix.indices, minlength=matrix.shape[1])
+        with numpy.errstate(divide='ignore'):
+            idfs = numpy.log(1.0 * matrix.shape[0] / dfs) / numpy.log(2.0)
+
+    # tf-idf weights normalized to unit length per sentence, as TfidfModel does
+    weights = matrix.data * idfs[matrix.indices]
+    # TfidfModel squares every weight, a numpy scalar, with pow(): with an array exponent numpy
+    # does too, while weights ** 2 multiplies, which may differ in the last bit
+    squares = numpy.power(weights, numpy.full(len(weights), 2.0))
+    norms = numpy.sqrt(_row_sums(squares, matrix.indptr))
+    norms[norms == 0.0] = 1.0
+    weights /= numpy.repeat(norms, numpy.diff(matrix.indptr))
+    weights[numpy.abs(weights) <= CorpusIdf.eps] = 0.0
+    scores = _row_sums(weights, matrix.indptr)
+
+    # Remove sentences that are too long
+    lengths = numpy.array([len(sent) for sent in sentences])
+    sent_ids = numpy.flatnonzero(lengths <= sentences_length(sentences))
+    return sent_ids, scores[sent_ids]
+
+
+def select_sentences_sparse(sent_ids, scores, extract_len):
+    """Returns the extract_len highest scored (sentence id, score) in document order."""
+    # A stable sort keeps equally scored sentences in document order, as sorted() does
+    top = numpy.argsort(-scores, kind='mergesort')[:extract_len]
+    top.sort()
+    return [(int(sent_ids[i]), float(scores[i])) for i in top]
+
+
+def extraction_length(sentences, summary_len):
+    """Returns the number of sentences that make a summary_len percent "summary"."""
+    return int(round(len(sentences) * (int(summary_len)) / 100.0))
+
+
+def select_sentences(sentences_score, extract_len):
+    """Returns the extract_len highest scored (sentence id, score) in document order."""
+    # Sort sentences by score in descending order
+    sorted_sents_by_score = sorted(sentences_score, key=itemgetter(1), reverse=True)
+    # Sort hi score sentences by sentence number as the appear in document_words
+    return sorted(sorted_sents_by_score[:extract_len], key=itemgetter(0))
+
+
+class Summarizer(object):
+    """
+    Summarizes many documents with one set of NLTK models loaded.
+
+    The sentence tokenizer, stemmer, stoplist and, if stages need it, the POS tagger are
+    loaded once, when the Summarizer is created, and are shared by every document it
+    summarizes.
+    timings adds up the seconds spent in every preprocessing stage.
+
+    summary_len: extraction length in percent of the sentences of a document
+    idf_model: a CorpusIdf to score against, instead of a model fitted on every document
+    update_idf: count every document in idf_model, an IncrementalIdf, before scoring it
+    scoring: 'gensim', or 'sparse' for the same extraction with array operations
+    min_count, stoplist: as in Preprocess
+    streaming: preprocess with StreamPreprocess, which keeps only the sentence spans and stems
+    stages: the optional Preprocess stages to run ('tag', 'chunk', 'collocations')
+    stem_cache: size of the LRU cache of stems (0 for none), warm started from stem_cache_file
+    html: documents are HTML pages, of which only the main text (extMainTree) is summarized
+    html_parser: the text_tools parser backend the pages are parsed with, once
+    html_threshold: the text density threshold of the main text
+    html_thresholds: a text_tools.ThresholdTable of the thresholds of the domains of the
+        document ids (URLs), html_threshold for other domains
+    html_boilerplate: learn the boilerplate branches of the pages of every site and skip
+        them in its later pages (a text_tools.BoilerplateCache)
+
+    Example of use:
+        >>> from extract import Summarizer
+        >>> summarizer = Summarizer(summary_len=20)
+        >>> summary = summarizer.summarize(article)
+        >>> for doc_id, summary in summarizer.summarize_many(iter_documents('articles/')):
+        ...     print doc_id, len(summary)
+        >>> summarizer = Summarizer(html=True, html_parser='lxml')
+        >>> write_summaries(summarizer.summarize_many(crawl.iter_html_documents('crawl.warc.gz')))
+    """
+
+    def __init__(self, summary_len=10, idf_model=None, scoring='gensim', min_count=2, stoplist=None,
+                 streaming=False, stages=(), stem_cache=100000, stem_cache_file=None, update_idf=False,
+                 html=False, html_threshold=0.5, html_parser=text_tools.PARSER, html_thresholds=None,
+                 html_boilerplate=False):
+        self.summary_len = summary_len
+        self.idf_model = idf_model
+        self.update_idf = update_idf
+        self.scoring = scoring
+        self.min_count = min_count
+        self.streaming = streaming
+        self.stages = stages
+        self.timings = {}
+        self.sent_tokenizer = load_sent_tokenizer()
+        # The POS tags are read only by the optional 'tag' and 'chunk' stages:
+        self.tagger = load_tagger() if set(stages) & set(('tag', 'chunk')) else None
+        if stem_cache and stem_cache_file and os.path.exists(stem_cache_file):
+            self.stemmer = CachedStemmer.load(stem_cache_file, PorterStemmer(), stem_cache)
+        elif stem_cache:
+            self.stemmer = CachedStemmer(PorterStemmer(), stem_cache)
+        else:
+            self.stemmer = PorterStemmer()
+        self.stoplist = stoplist if stoplist is not None else stopwords.load()
+        self.html_threshold = html_threshold
+        self.html_thresholds = html_thresholds
+        self.html_templates = text_tools.BoilerplateCache() if html_boilerplate else None
+        self.html_parser = text_tools.HtmlParser(html_parser) if html else None
+
+    def main_text(self, html, url=None):
+        """Returns the plain text of the main part of the HTML page html, found at url."""
+        start = time.time()
+        threshold = self.html_thresholds.lookup(url) if self.html_thresholds is not None else self.html_threshold
+        template = self.html_templates.lookup(url) if self.html_templates is not None else None
+        text = text_tools.get_tree_text(text_tools.extMainTree(html, threshold, parser=self.html_parser,
+                                                               template=template))
+        self.timings['html'] = self.timings.get('html', 0.0) + time.time() - start
+        return text
+
+    def preprocess(self, document, doc_id=None, keep_tokens=False):
+        """Returns the Preprocess of document, with its stemmed_tokens for an IDF model if keep_tokens."""
+        if self.html_parser is not None:
+            document = self.main_text(document, doc_id)
+        preprocess = StreamPreprocess if self.streaming else Preprocess
+        ppd = preprocess(document, sent_tokenizer=self.sent_tokenizer, tagger=self.tagger, stemmer=self.stemmer,
+                         stoplist=self.stoplist, min_count=self.min_count, stages=self.stages,
+                         keep_tokens=keep_tokens)
+        for stage, seconds in ppd.timings.iteritems():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        return ppd
+
+    def extract(self, document, doc_id=None):
+        """Returns the preprocessed document and its (sentence id, score) extraction."""
+        ppd = self.preprocess(document, doc_id, keep_tokens=self.update_idf)
+        if not ppd.sentences:
+            return ppd, []  # Nothing to score, e.g. an empty file or page
+        if self.update_idf:
+            self.idf_model.add(ppd.stemmed_tokens)  # Rare words included, they are in the document too
+        extract_len = extraction_length(ppd.sentences, self.summary_len)
+        if self.scoring == 'sparse':
+            sent_ids, scores = score_sentences_sparse(ppd.sentences, ppd.dictionary_text, self.idf_model)
+            return ppd, select_sentences_sparse(sent_ids, scores, extract_len)
+        sentences_score = score_sentences(ppd.sentences, ppd.dictionary_text, self.idf_model)
+        return ppd, select_sentences(sentences_score, extract_len)
+
+    def summarize(self, document, doc_id=None):
+        """Returns the summary sentences of document in the order they appear."""
+        ppd, hi_score_sents = self.extract(document, doc_id)
+        return [ppd.sentences[sent_id] for sent_id, _ in hi_score_sents]
+
+    def summarize_many(self, documents):
+        """
+        Yields (document id, summary sentences) for every (document id, text) in documents.
+
+        A document that fails is logged and skipped, so that it does not end the batch.
+        """
+        for doc_id, document in documents:
+            try:
+                summary = self.summarize(document, doc_id)
+            except Exception:
+                logging.exception('Skipped document %s', doc_id)
+                continue
+            yield doc_id, summary
+
+    def build_idf(self, documents):
+        """
+        Returns a CorpusIdf built over the (document id, text) pairs of documents.
+
+        A term counts in every document it appears in, so its stems are counted before
+        the words that are rare in the document are removed.
+        """
+        texts = (self.preprocess(document, doc_id, keep_tokens=True).stemmed_tokens for doc_id, document in documents)
+        return CorpusIdf.build(texts)
+
+
+_worker_summarizer = None
+
+
+def _init_worker(idf_fname, summarizer_args):
+    """Loads the NLTK models (and IDF table) of a pool worker once, when the worker starts."""
+    global _worker_summarizer
+    idf_model = CorpusIdf.load(idf_fname) if idf_fname else None
+    _worker_summarizer = Summarizer(idf_model=idf_model, **summarizer_args)
+
+
+def _summarize_worker(doc):
+    """Returns (document id, summary sentences), or (document id, None) if the document failed."""
+    doc_id, document = doc
+    try:
+        return doc_id, _worker_summarizer.summarize(document, doc_id)
+    except Exception:
+        logging.exception('Skipped document %s', doc_id)
+        return doc_id, None
+
+
+def summarize_parallel(documents, workers=None, idf_fname=None, **summarizer_args):
+    """
+    Yields (document id, summary sentences) for every (document id, text) in documents,
+    summarizing them in a pool of worker processes.
+
+    Every worker has its own Summarizer, created with summarizer_args. Documents are
+    handed out one at a time, so a slow document keeps only one worker busy while the
+    others move on to the next ones. The summaries are yielded in the order of documents,
+    without the ones that failed.
+    The workers share the stoplist loaded here and memory-map the saved CorpusIdf
+    idf_fname, so they share one copy of its IDF table.
+    """
+    if idf_fname:
+        CorpusIdf.load(idf_fname)  # Fail here rather than in every worker initializer
+    summarizer_args.setdefault('stoplist', stopwords.load())
+    pool = multiprocessing.Pool(workers, _init_worker, (idf_fname, summarizer_args))
+    try:
+        for doc_id, summary in pool.imap(_summarize_worker, documents, chunksize=1):
+            if summary is not None:
+                yield doc_id, summary
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def read_document(file_name):
+    f = codecs.open(file_name, encoding='utf-8')
+    document = f.read()
+    f.close()
+    return document
+
+
+def iter_documents(source):
+    """
+    Yields (document id, text) pairs from a source of documents.
+
+    The source may be a directory (every file in it), a glob pattern, a JSONL file
+    or '-' for JSONL read from the standard input. Every JSONL line is an object
+    with an "id" and a "text" field; other lines, and files that can not be read as
+    UTF-8, are logged and skipped.
+    """
+    if source == '-' or source.endswith('.jsonl'):
+        f = sys.stdin if source == '-' else open(source)
+        for line_no, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                doc_id, text = record.get('id', line_no), record['text']
+            except (ValueError, KeyError, AttributeError):
+                logging.warning('Skipped line %d of %s: not a JSON object with a "text" field', line_no + 1, source)
+                continue
+            yield doc_id, text
+        if f is not sys.stdin:
+            f.close()
+        return
+    if os.path.isdir(source):
+        file_names = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        file_names = glob.glob(source)
+    for file_name in sorted(file_names):
+        if not os.path.isfile(file_name):
+            continue
+        try:
+            document = read_document(file_name)
+        except (IOError, UnicodeDecodeError) as error:
+            logging.warning('Skipped %s: %s', file_name, error)
+            continue
+        yield os.path.basename(file_name), document
+
+
+def write_summaries(summaries, output_dir=None):
+    """
+    Writes every (document id, summary sentences) either as a <document id>.summary
+    file in output_dir or, without output_dir, as a JSONL line in the standard output.
+    """
+    for doc_id, summary in summaries:
+        if output_dir is not None:
+            f = codecs.open(os.path.join(output_dir, '%s.summary' % doc_id), 'w', encoding='utf-8')
+            f.write(u'\n'.join(summary) + u'\n')
+            f.close()
+        else:
+            sys.stdout.write(json.dumps({'id': doc_id, 'summary': summary}) + '\n')
+            sys.stdout.flush()
+
+
+def snapshot_every(summaries, idf_model, fname, every):
+    """Passes summaries through, saving idf_model as fname every so many documents and at the end."""
+    for count, summary in enumerate(summaries, 1):
+        yield summary
+        if count % every == 0:
+            idf_model.save(fname)
+    idf_model.save(fname)
+
+
+def write_timings(timings):
+    """Writes the seconds spent in every preprocessing stage in the standard error."""
+    for stage, seconds in sorted(timings.iteritems(), key=itemgetter(1), reverse=True):
+        sys.stderr.write('{0:<16} {1:10.4f}s\n'.format(stage, seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sentence extraction of text documents.')
+    parser.add_argument('file', nargs='?', help='document to summarize, or the documents source in batch mode')
+    parser.add_argument('summary_len', nargs='?', help='extraction length in percent (without %%)')
+    parser.add_argument('--batch', action='store_true',
+                        help='summarize every document of a directory, glob pattern, JSONL file or - (stdin)')
+    parser.add_argument('--output-dir', help='write one <id>.summary file per document in batch mode')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes in batch mode (0 for one per CPU)')
+    parser.add_argument('--idf', metavar='MODEL', help='score with the corpus IDF model saved as MODEL')
+    parser.add_argument('--build-idf', metavar='MODEL',
+                        help='build a corpus IDF model over the documents of FILE and save it as MODEL')
+    parser.add_argument('--incremental-idf', metavar='MODEL',
+                        help='update the IDF model saved as MODEL (a new one if there is none) with every document '
+                             'of a batch before scoring it, saving snapshots of it as MODEL')
+    parser.add_argument('--half-life', type=float, metavar='SECONDS',
+                        help='with --incremental-idf, halve the weight of a document every SECONDS')
+    parser.add_argument('--window', type=int, metavar='DOCS',
+                        help='with --incremental-idf, count only the last DOCS documents')
+    parser.add_argument('--snapshot-every', type=int, default=1000, metavar='DOCS',
+                        help='with --incremental-idf, save a snapshot every DOCS documents (default: 1000)')
+    parser.add_argument('--scoring', choices=['gensim', 'sparse'], default='gensim',
+                        help='sentence scoring backend (default: gensim)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='preprocess in streaming mode, keeping only sentence spans and stemmed words')
+    parser.add_argument('--stages', default='', help='comma separated optional stages to run: tag,chunk,collocations')
+    parser.add_argument('--timings', action='store_true',
+                        help='write the seconds spent in every preprocessing stage (not in --workers mode)')
+    parser.add_argument('--stem-cache', type=int, default=100000, metavar='N',
+                        help='cache the stems of the last N words (default: 100000, 0 for no cache)')
+    parser.add_argument('--stem-cache-file', metavar='FILE',
+                        help='warm start the stem cache from FILE and, without --workers, save it there at the end')
+    parser.add_argument('--language', default='english', help='stopwords language (default: english)')
+    parser.add_argument('--stopwords', metavar='FILE', help='read the stopwords from FILE instead')
+    parser.add_argument('--min-count', type=int, default=2,
+                        help='remove the words that appear less times in a document (default: 2, 0 keeps all)')
+    parser.add_argument('--html', action='store_true',
+                        help='documents are HTML pages, from .html files or WARC files (.warc, .warc.gz, - for stdin) '
+                             'in batch mode, whose main text is summarized')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='with --html, the text density threshold of the main text (default: 0.5)')
+    parser.add_argument('--parser', choices=text_tools.PARSERS, default=text_tools.PARSER,
+                        help='with --html, the HTML parser backend (default: %s)' % text_tools.PARSER)
+    parser.add_argument('--thresholds', metavar='FILE',
+                        help='with --html, the density thresholds of the domains of the pages saved in FILE, '
+                             '--threshold for other domains')
+    parser.add_argument('--calibrate-thresholds', metavar='FILE',
+                        help='calibrate the density threshold of every domain of the HTML pages of file, save them '
+                             'to FILE and exit')
+    parser.add_argument('--boilerplate-cache', action='store_true',
+                        help='with --html, learn the boilerplate branches of the pages of every site and skip them '
+                             'in its later pages (per worker with --workers)')
+    args = parser.parse_args()
+    # Batch mode logs only the documents it skips, not the progress of gensim:
+    logging.basicConfig(format='%(asctime)s : %(levelname)s : %(message)s',
+                        level=logging.WARNING if args.batch else logging.INFO)
+    if args.incremental_idf and (args.idf or args.workers != 1 or not args.batch):
+        parser.error('--incremental-idf needs --batch and goes with neither --idf nor --workers')
+    if args.streaming and args.stages.strip(','):
+        parser.error('--streaming keeps no word lists for the optional --stages')
+
+    read_documents = crawl.iter_html_documents if args.html else iter_documents
+    html_args = {'html': args.html, 'html_threshold': args.threshold, 'html_parser': args.parser,
+                 'html_boilerplate': args.boilerplate_cache}
+    if args.thresholds:
+        html_args['html_thresholds'] = text_tools.ThresholdTable.load(args.thresholds, args.threshold)
+
+    if args.calibrate_thresholds:
+        table = text_tools.ThresholdTable.calibrate(crawl.iter_html_documents(args.file), args.threshold,
+                                                    parser=text_tools.HtmlParser(args.parser))
+        table.save(args.calibrate_thresholds)
+        return
+
+    stoplist = stopwords.load(args.language, args.stopwords)
+    stages = tuple(stage for stage in args.stages.split(',') if stage)
+
+    if args.build_idf:
+        # The vocabulary of the model is the one of the scoring runs with the same options
+        summarizer = Summarizer(min_count=0, stoplist=stoplist, streaming=args.streaming,
+                                stem_cache=args.stem_cache, stem_cache_file=args.stem_cache_file, **html_args)
+        summarizer.build_idf(read_documents(args.file)).save(args.build_idf)
+        return
+
+    if args.file is None or args.summary_len is None:
+        args.file = raw_input("File to open: ")
+        args.summary_len = raw_input("Extraction length in percent (without %): ")
+
+    if args.batch and args.workers != 1:
+        documents = read_documents(args.file)
+        summaries = summarize_parallel(documents, args.workers or None, args.idf, summary_len=args.summary_len,
+                                       scoring=args.scoring, min_count=args.min_count, stoplist=stoplist,
+                                       streaming=args.streaming, stages=stages, stem_cache=args.stem_cache,
+                                       stem_cache_file=args.stem_cache_file, **html_args)
+        write_summaries(summaries, args.output_dir)
+        return
+
+    if args.incremental_idf and os.path.exists(args.incremental_idf + '.state'):
+        idf_model = IncrementalIdf.load(args.incremental_idf)
+    elif args.incremental_idf:
+        idf_model = IncrementalIdf(args.half_life, args.window)
+    else:
+        idf_model = CorpusIdf.load(args.idf) if args.idf else None
+    summarizer = Summarizer(summary_len=args.summary_len, idf_model=idf_model, scoring=args.scoring,
+                            min_count=args.min_count, stoplist=stoplist, streaming=args.streaming, stages=stages,
+                            stem_cache=args.stem_cache, stem_cache_file=args.stem_cache_file,
+                            update_idf=bool(args.incremental_idf), **html_args)
+
+    if args.batch:
+        summaries = summarizer.summarize_many(read_documents(args.file))
+        if args.incremental_idf:
+            summaries = snapshot_every(summaries, idf_model, args.incremental_idf, args.snapshot_every)
+        write_summaries(summaries, args.output_dir)
+        if args.timings:
+            write_timings(summarizer.timings)
+        if args.stem_cache and args.stem_cache_file:
+            summarizer.stemmer.save(args.stem_cache_file)
+        return
+
+    # Read article
+    article = crawl.read_html(args.file) if args.html else read_document(args.file)
+    ppd, hi_score_sents = summarizer.extract(article)
+    sentences = ppd.sentences
+
+    # Some statistics
+    print "Document sentences: {0}".format(len(sentences))
+    print "Extraction sentences: {0}\n".format(extraction_length(sentences, args.summary_len))
+    #print document_sents[0]  # print title
+    for sent in hi_score_sents:
+        sent_id, _ = sent
+        print sentences[sent_id]
+    if args.timings:
+        write_timings(summarizer.timings)
+    if args.stem_cache and args.stem_cache_file:
+        summarizer.stemmer.save(args.stem_cache_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,109 +1,167 @@
-import htmllib
-import StringIO
-from formatter import AbstractFormatter, AbstractWriter
-from docutils.writers import Writer
+try:
+    from HTMLParser import HTMLParser
+except ImportError:  # Python 3
+    from html.parser import HTMLParser
+try:
+    from html import unescape
+except ImportError:  # Python 2
+    unescape = HTMLParser().unescape
+import codecs
 
 __author__ = 'aris'
-__version__ = 0.1
+__version__ = 0.2
 __date__ = '10/27/13'
 
 """ Extract only the usefull text from an HTML Page
 
     Parse the HTML code and keep track of the number of bytes processed.
-    Store the text output on a per-line, or per-paragraph basis.
-    Associate with each text line the number of bytes of HTML required to describe it.
-    Compute the text density of each line by calculating the ratio of text to bytes.
-    Then decide if the line is part of the content by using a neural network.
+    Store the text output on a per-paragraph basis.
+    Associate with each paragraph the number of bytes of HTML required to describe it.
+    Compute the text density of each paragraph by calculating the ratio of text to bytes.
+    Then decide if the paragraph is part of the content by comparing its density to a threshold.
+
+    The HTML is tokenized incrementally, so it can be fed in chunks as they come off the
+    network, and every content paragraph is given out as soon as it ends, when its density
+    is known. Bytes are counted in characters of the HTML as it is fed.
 """
 
-def extract_text(html):
-    # Derive from formatter.AbstractWriter to store paragraphs.
-    writer = LineWriter()
-    # Default formatter sends commands to our writer.
-    formatter = AbstractFormatter(writer)
-    # Derive from htmllib.HTMLParser to track parsed bytes.
-    parser = TrackingParser(writer, formatter)
-    # Give the parser the raw HTML data.
-    parser.feed(html)
-    parser.close()
-    # Filter the paragraphs stored and output them.
-    return writer.output()
+# Tags that end a paragraph:
+BLOCK_TAGS = frozenset(['address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'footer',
+                        'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p',
+                        'pre', 'section', 'table', 'td', 'th', 'tr', 'ul'])
+# Tags whose content is not text of the page:
+IGNORED_TAGS = frozenset(['script', 'style', 'title', 'noscript', 'template'])
+
+
+def extract_text(html, threshold=0.5):
+    """Return the text of the paragraphs of html denser than threshold, one per line."""
+    return u''.join(paragraph.text + u'\n' for paragraph in iter_paragraphs([html], threshold))
+
+
+def iter_paragraphs(chunks, threshold=0.5, encoding=None):
+    """
+    Yield the paragraphs denser than threshold of the html given in chunks, as soon as
+    every paragraph ends. With encoding the chunks are bytes and are decoded incrementally.
+
+    Example of use:
+        >>> import urllib2
+        >>> response = urllib2.urlopen('http://www.bbc.co.uk/news/health-25134722')
+        >>> for paragraph in iter_paragraphs(iter(lambda: response.read(4096), ''), encoding='utf-8'):
+        ...     print paragraph.density, paragraph.text
+    """
+    decoder = codecs.getincrementaldecoder(encoding)('replace') if encoding else None
+    parser = DensityParser(threshold)
+    for chunk in chunks:
+        for paragraph in parser.feed(decoder.decode(chunk) if decoder else chunk):
+            yield paragraph
+    if decoder:
+        for paragraph in parser.feed(decoder.decode(b'', final=True)):
+            yield paragraph
+    for paragraph in parser.close():
+        yield paragraph
+
+
+class Paragraph(object):
+    def __init__(self):
+        self.data = []
+        self.text = u''
+        self.bytes = 0
+        self.density = 0.0
 
 
-class TrackingParser(htmllib.HTMLParser):
-    """Try to keep accurate pointer of parsing location."""
+class DensityParser(HTMLParser):
+    """
+    Streaming HTML tokenizer that splits the text of a page in paragraphs at block tags
+    and measures the density of every paragraph: its length over the length of the HTML
+    it took, which is its text plus the markup since the text before it.
+
+    feed() and close() return the paragraphs denser than threshold that ended in the
+    html given to them.
+
+    Example of use:
+        >>> parser = DensityParser(threshold=0.5)
+        >>> for chunk in chunks:
+        ...     for paragraph in parser.feed(chunk):
+        ...         print paragraph.text
+        >>> paragraphs = parser.close()
+    """
+
+    def __init__(self, threshold=0.5):
+        HTMLParser.__init__(self)
+        self.convert_charrefs = False  # Python 3: entities are counted as they are written
+        self.threshold = threshold
+        self.paragraph = Paragraph()
+        self.markup = 0  # HTML length since the last text
+        self.ignored = 0  # Depth in IGNORED_TAGS
+        self.ready = []
+
+    def feed(self, data):
+        HTMLParser.feed(self, data)
+        return self._pop_ready()
+
+    def close(self):
+        HTMLParser.close(self)
+        self._end_paragraph()
+        return self._pop_ready()
+
+    def _pop_ready(self):
+        ready, self.ready = self.ready, []
+        return ready
+
+    def _end_paragraph(self):
+        paragraph = self.paragraph
+        # White space is collapsed, also across the chunks and entities the text came in:
+        paragraph.text = u' '.join(u''.join(paragraph.data).split())
+        if paragraph.text:
+            paragraph.density = len(paragraph.text) / float(paragraph.bytes)
+            if paragraph.density > self.threshold:
+                self.ready.append(paragraph)
+            self.paragraph = Paragraph()
+
+    def _text(self, text, length):
+        if self.ignored:
+            self.markup += length
+            return
+        self.paragraph.data.append(text)
+        self.paragraph.bytes += self.markup + length
+        self.markup = 0
 
-    def __init__(self, writer, *args):
-        htmllib.HTMLParser.__init__(self, *args)
-        self.writer = writer
+    def handle_starttag(self, tag, attrs):
+        self.markup += len(self.get_starttag_text())
+        if tag in IGNORED_TAGS:
+            self.ignored += 1
+        elif tag in BLOCK_TAGS:
+            self._end_paragraph()
 
-    def parse_starttag(self, i):
-        index = htmllib.HTMLParser.parse_starttag(self, i)
-        self.writer.index = index
-        return index
+    def handle_startendtag(self, tag, attrs):
+        self.markup += len(self.get_starttag_text())
+        if tag in BLOCK_TAGS:
+            self._end_paragraph()
 
-    def parse_endtag(self, i):
-        self.writer.index = i
-        return htmllib.HTMLParser.parse_endtag(self, i)
+    def handle_endtag(self, tag):
+        self.markup += len(tag) + 3
+        if tag in IGNORED_TAGS:
+            self.ignored = max(self.ignored - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._end_paragraph()
 
+    def handle_data(self, data):
+        self._text(data, len(data))
 
-class Paragraph:
-    def __init__(self):
-        self.text = ''
-        self.bytes = 0
-        self.density = 0.0
+    def handle_entityref(self, name):
+        self._text(unescape('&%s;' % name), len(name) + 2)
 
+    def handle_charref(self, name):
+        self._text(unescape('&#%s;' % name), len(name) + 3)
 
-class LineWriter(AbstractWriter):
-    def __init__(self, *args):
-        self.last_index = 0
-        self.lines = [Paragraph()]
-        AbstractWriter.__init__(self)
-
-    def send_flowing_data(self, data):
-        # Work out the length of this text chunk.
-        t = len(data)
-        # We've parsed more text, so increment index.
-        self.index += t
-        # Calculate the number of bytes since last time.
-        b = self.index - self.last_index
-        self.last_index = self.index
-        # Accumulate this information in current line.
-        l = self.lines[-1]
-        l.text += data
-        l.bytes += b
-
-    def send_paragraph(self, blankline):
-        """Create a new paragraph if necessary."""
-        if self.lines[-1].text == '':
-            return
-        self.lines[-1].text += 'n' * (blankline + 1)
-        self.lines[-1].bytes += 2 * (blankline + 1)
-        self.lines.append(Writer.Paragraph())
-
-    def send_literal_data(self, data):
-        self.send_flowing_data(data)
-
-    def send_line_break(self):
-        self.send_paragraph(0)
-
-    def compute_density(self):
-        """Calculate the density for each line, and the average."""
-        total = 0.0
-        for l in self.lines:
-            l.density = len(l.text) / float(l.bytes)
-            total += l.density
-            # Store for optional use by the neural network.
-        self.avg = total / float(len(self.lines))
-
-    def output(self):
-        """Return a string with the useless lines filtered out."""
-        self.compute_density()
-        output = StringIO.StringIO()
-        for l in self.lines:
-            # Check density against threshold.
-            # Custom filter extensions go here.
-            if l.density > 0.5:
-                output.write(l.text)
-
-        return output.getvalue()
\ No newline at end of file
+    def handle_comment(self, data):
+        self.markup += len(data) + 7
+
+    def handle_decl(self, decl):
+        self.markup += len(decl) + 3
+
+    def handle_pi(self, data):
+        self.markup += len(data) + 3
+
+    def unknown_decl(self, data):
+        self.markup += len(data) + 5
@@ -0,0 +1,209 @@
+"""
+Corpus level IDF weights.
+
+Instead of fitting a tf-idf model on the sentences of the one document being summarized,
+the document frequencies are counted once over a reference corpus of documents and are
+saved to disk. Later runs load the dictionary and the IDF table (memory-mapped) and weight
+the sentences of new documents against them without refitting.
+
+For a live feed of documents, IncrementalIdf updates the document frequencies as every
+document arrives instead.
+"""
+
+__author__ = 'Aris Fergadis'
+__version__ = 0.1
+
+import cPickle
+import math
+import os
+import time
+from collections import deque
+
+import numpy
+from gensim import corpora
+
+
+class CorpusIdf(object):
+    """
+    A gensim Dictionary and an IDF table built once over a reference corpus.
+
+    The weights are computed as in gensim's TfidfModel: tf * log2(total docs / doc freq),
+    normalized to unit length. Terms unknown to the reference corpus are ignored.
+
+    Example of use:
+        >>> from idf_model import CorpusIdf
+        >>> idf = CorpusIdf.build(texts)  # texts is a list of token lists, one per document
+        >>> idf.save('news')
+        >>> idf = CorpusIdf.load('news')
+        >>> idf.tfidf(idf.doc2bow(['sleep', 'hour']))
+    """
+
+    eps = 1e-12
+
+    def __init__(self, dictionary, idfs):
+        self.dictionary = dictionary
+        self.idfs = idfs
+
+    @classmethod
+    def build(cls, texts):
+        """Counts the document frequencies of texts, an iterable of token lists one per document."""
+        dictionary = corpora.Dictionary()
+        for tokens in texts:
+            dictionary.doc2bow(tokens, allow_update=True)
+        idfs = numpy.zeros(len(dictionary), dtype=numpy.float64)
+        for term_id, df in dictionary.dfs.iteritems():
+            idfs[term_id] = numpy.log(1.0 * dictionary.num_docs / df) / numpy.log(2.0)
+        return cls(dictionary, idfs)
+
+    def save(self, fname):
+        """Saves the model as fname.dict and fname.idf.npy"""
+        self.dictionary.save(fname + '.dict')
+        numpy.save(fname + '.idf.npy', self.idfs)
+
+    @classmethod
+    def load(cls, fname, mmap='r'):
+        """Loads a saved model. The IDF table is memory-mapped unless mmap is None."""
+        dictionary = corpora.Dictionary.load(fname + '.dict')
+        idfs = numpy.load(fname + '.idf.npy', mmap_mode=mmap)
+        return cls(dictionary, idfs)
+
+    def doc2bow(self, tokens):
+        return self.dictionary.doc2bow(tokens)
+
+    def tfidf(self, bow):
+        """Returns the normalized tf-idf vector of bow as a list of (term id, weight)."""
+        vector = [(term_id, tf * float(self.idfs[term_id])) for term_id, tf in bow
+                  if abs(self.idfs[term_id]) > self.eps]
+        length = math.sqrt(sum(weight ** 2 for _, weight in vector))
+        if length == 0.0:
+            return []
+        return [(term_id, weight / length) for term_id, weight in vector if abs(weight / length) > self.eps]
+
+
+class IncrementalIdf(CorpusIdf):
+    """
+    IDF weights that are updated as every document of a live feed is added.
+
+    Old documents can count less, or not at all: with half_life (in seconds) the weight
+    of a document halves every half_life seconds after it was added, and with window
+    only the last window documents are counted. The terms of the documents that left the
+    window are removed from the dictionary once they are half of it, so that it holds
+    only terms of the window, and as many again at most. The model can be saved at any
+    time and loaded by a restarted worker, which goes on from where it was saved.
+
+    Example of use:
+        >>> from idf_model import IncrementalIdf
+        >>> idf = IncrementalIdf(half_life=24 * 3600)
+        >>> idf.add(['sleep', 'hour', 'sleep'])
+        >>> idf.tfidf(idf.doc2bow(['sleep', 'hour']))
+        >>> idf.save('feed')
+        >>> idf = IncrementalIdf.load('feed')
+    """
+
+    def __init__(self, half_life=None, window=None, dictionary=None):
+        self.dictionary = dictionary if dictionary is not None else corpora.Dictionary()
+        self.half_life = half_life
+        self.window = window
+        # Document frequencies and number of documents are counted in units of the
+        # weight of a document added at reference_time. Decay leaves the ratio
+        # num_docs / df, and so the IDF, unchanged, so only newer documents are
+        # given larger weights, instead of decaying every count.
+        self.dfs = numpy.zeros(max(len(self.dictionary), 1024))
+        self.num_docs = 0.0
+        self.reference_time = None
+        self.recent = deque()  # (weight, term ids) of the documents in the window
+        self.expired = 0  # Terms counted by no document of the window since the last compact()
+        self._idfs = None
+
+    def add(self, tokens, timestamp=None):
+        """Counts the document made of tokens, added at timestamp (default: now)."""
+        weight = self._weight(timestamp if timestamp is not None else time.time())
+        term_ids = numpy.array([term_id for term_id, _ in self.dictionary.doc2bow(tokens, allow_update=True)],
+                               dtype=numpy.int64)
+        if len(self.dictionary) > len(self.dfs):
+            self.dfs = numpy.concatenate([self.dfs, numpy.zeros(max(len(self.dictionary), len(self.dfs)))])
+        self.dfs[term_ids] += weight
+        self.num_docs += weight
+        if self.window:
+            self.recent.append((weight, term_ids))
+            while len(self.recent) > self.window:
+                old_weight, old_term_ids = self.recent.popleft()
+                self.dfs[old_term_ids] -= old_weight
+                self.num_docs -= old_weight
+                # Do not leave rounding errors behind for terms that are gone
+                gone = old_term_ids[self.dfs[old_term_ids] < old_weight * 1e-9]
+                self.dfs[gone] = 0.0
+                self.expired += len(gone)
+            if self.expired * 2 > len(self.dictionary):
+                self.compact()
+        self._idfs = None
+
+    def compact(self):
+        """Removes the terms that no document of the window counts from the dictionary and renumbers the others."""
+        size = len(self.dictionary)
+        counted = self.dfs[:size] > 0.0
+        if not counted.all():
+            tokens = dict((term_id, token) for token, term_id in self.dictionary.token2id.iteritems())
+            kept = numpy.flatnonzero(counted)
+            self.dictionary.filter_tokens(bad_ids=numpy.flatnonzero(~counted).tolist())
+            new_ids = numpy.zeros(size, dtype=numpy.int64)
+            new_ids[kept] = [self.dictionary.token2id[tokens[term_id]] for term_id in kept]
+            dfs = numpy.zeros(max(len(self.dictionary), 1024))
+            dfs[new_ids[kept]] = self.dfs[kept]
+            self.dfs = dfs
+            self.recent = deque((weight, new_ids[term_ids]) for weight, term_ids in self.recent)
+        self.expired = 0
+        self._idfs = None
+
+    def _weight(self, timestamp):
+        if self.half_life is None:
+            return 1.0
+        if self.reference_time is None:
+            self.reference_time = timestamp
+        weight = 2.0 ** ((timestamp - self.reference_time) / float(self.half_life))
+        if weight > 1e100:
+            # Rescale the counts, so that a document added now weighs 1.0 again
+            self.dfs /= weight
+            self.num_docs /= weight
+            self.recent = deque((old_weight / weight, term_ids) for old_weight, term_ids in self.recent)
+            self.reference_time = timestamp
+            weight = 1.0
+        return weight
+
+    @property
+    def idfs(self):
+        if self._idfs is None:
+            dfs = self.dfs[:len(self.dictionary)]
+            idfs = numpy.zeros(len(dfs))
+            counted = dfs > 0.0
+            idfs[counted] = numpy.log(self.num_docs / dfs[counted]) / numpy.log(2.0)
+            self._idfs = idfs
+        return self._idfs
+
+    def save(self, fname):
+        """
+        Saves a snapshot of the model, dictionary included, as fname.state. The file is
+        written under a temporary name first and renamed, so a crash never leaves half a
+        snapshot.
+        """
+        state = {'half_life': self.half_life, 'window': self.window, 'dictionary': self.dictionary,
+                 'dfs': self.dfs[:len(self.dictionary)], 'num_docs': self.num_docs,
+                 'reference_time': self.reference_time, 'recent': list(self.recent), 'expired': self.expired}
+        f = open(fname + '.state.tmp', 'wb')
+        cPickle.dump(state, f, cPickle.HIGHEST_PROTOCOL)
+        f.close()
+        os.rename(fname + '.state.tmp', fname + '.state')
+
+    @classmethod
+    def load(cls, fname):
+        """Restores a snapshot saved with save()."""
+        f = open(fname + '.state', 'rb')
+        state = cPickle.load(f)
+        f.close()
+        model = cls(state['half_life'], state['window'], state['dictionary'])
+        model.dfs[:len(state['dfs'])] = state['dfs']
+        model.num_docs = state['num_docs']
+        model.reference_time = state['reference_time']
+        model.recent = deque(state['recent'])
+        model.expired = state['expired']
+        return model
@@ -0,0 +1,66 @@
+"""
+A bounded least recently used cache, shared by the caches of the package: the stems of
+CachedStemmer, the WordNet lookups of WordNetCache, the corrections of SpellingReplacer
+and the PageTemplates of BoilerplateCache.
+"""
+
+__author__ = 'Aris Fergadis'
+__version__ = 0.1
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    The values of the last maxsize keys looked up. The least recently used key is evicted
+    when the cache is full, and maxsize=0 keeps none. hits and misses count the lookups.
+
+    Example of use:
+        >>> from lru import LRUCache
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache.lookup('running', stemmer.stem), cache.lookup('running', stemmer.stem)
+        ('run', 'run')
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, compute):
+        """Returns the value of key, computed as compute(key) and cached if it is not cached."""
+        data = self.data
+        try:
+            value = data.pop(key)
+            self.hits += 1
+        except KeyError:
+            value = compute(key)
+            self.misses += 1
+            if not self.maxsize:
+                return value
+            if len(data) >= self.maxsize:
+                data.popitem(last=False)
+        data[key] = value  # (Re)insert as the most recently used
+        return value
+
+    def put(self, key, value):
+        """Caches value as the most recently used one, e.g. to warm start the cache."""
+        self.data.pop(key, None)
+        if not self.maxsize:
+            return
+        if len(self.data) >= self.maxsize:
+            self.data.popitem(last=False)
+        self.data[key] = value
+
+    def iteritems(self):
+        """Yields the cached (key, value) pairs, least recently used first."""
+        return self.data.iteritems()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
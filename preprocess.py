@@ -10,50 +10,209 @@ __date__ = '11/3/13'
 # Stemm
 # Wordnet (synonyms)
 
+import codecs
+import re
+import time
+from collections import Counter
+
+import nltk.data
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.tag import pos_tag
 from nltk.stem import PorterStemmer
 from nltk.collocations import BigramAssocMeasures, BigramCollocationFinder
 
+import stopwords
+from lru import LRUCache
+
+SENT_TOKENIZER = 'tokenizers/punkt/english.pickle'
+POS_TAGGER = 'taggers/maxent_treebank_pos_tagger/english.pickle'  # NLTK 2 default tagger
+BRACKETS = ('()', '[]')
+
+_bracket_patterns = {}  # brackets: (regexp matching any of them, opening bracket of every closing one)
+
+
+def load_sent_tokenizer():
+    return nltk.data.load(SENT_TOKENIZER)
+
+
+def load_tagger():
+    try:
+        from nltk.tag.perceptron import PerceptronTagger  # NLTK 3 default tagger
+    except ImportError:
+        return nltk.data.load(POS_TAGGER)
+    return PerceptronTagger()
+
+
+class CachedStemmer(object):
+    """
+    Wraps a stemmer and remembers the stems of the last maxsize words it stemmed.
+
+    Words are looked up lowercased in an LRUCache, so maxsize=0 caches none. hits and
+    misses count the lookups. The cache can be saved to a file and loaded by other
+    processes, so they start with the stems of known words.
+
+    Example of use:
+        >>> stemmer = CachedStemmer(PorterStemmer(), maxsize=100000)
+        >>> stemmer.stem('running'), stemmer.stem('Running')
+        ('run', 'run')
+        >>> stemmer.hits, stemmer.misses
+        (1, 1)
+        >>> stemmer.save('stems.tsv')
+        >>> stemmer = CachedStemmer.load('stems.tsv')
+    """
+
+    def __init__(self, stemmer=None, maxsize=100000):
+        self.stemmer = stemmer if stemmer is not None else PorterStemmer()
+        self.cache = LRUCache(maxsize)
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def stem(self, word):
+        return self.cache.lookup(word.lower(), self.stemmer.stem)
+
+    def save(self, fname):
+        """Writes the cached words and stems, least recently used first, one tab separated pair per line."""
+        f = codecs.open(fname, 'w', encoding='utf-8')
+        for word, stem in self.cache.iteritems():
+            f.write(u'%s\t%s\n' % (word, stem))
+        f.close()
+
+    @classmethod
+    def load(cls, fname, stemmer=None, maxsize=100000):
+        cached_stemmer = cls(stemmer, maxsize)
+        f = codecs.open(fname, encoding='utf-8')
+        for line in f:
+            word, stem = line.rstrip(u'\n').split(u'\t')
+            cached_stemmer.cache.put(word, stem)
+        f.close()
+        return cached_stemmer
+
+
+class Preprocess(object):
+    """
+    Splits a document in sentences and words and keeps the stemmed words of every sentence.
+
+    The tokenizer, tagger, stemmer and stoplist can be loaded once by the caller
+    and passed in, so that they are shared between many documents. Otherwise NLTK's
+    defaults are used.
+
+    Stemmed words that appear less than min_count times in the document are removed.
+    The default 2 removes the words that appear only once; 0 or None keeps every word.
+    With keep_tokens, stemmed_tokens keeps every stemmed word of the document, the rare
+    ones included, for the document frequencies of an IDF model; else it is None.
+
+    The optional stages, POS tagging (pos_text), chunking (chunked_text) and collocations
+    (collocation_text), are computed the first time they are read, or at once for the
+    names in stages ('tag', 'chunk', 'collocations'). The seconds spent in every stage
+    are kept in timings.
+    """
 
-class Preprocess():
-    def __init__(self, document):
+    def __init__(self, document, sent_tokenizer=None, tagger=None, stemmer=None, stoplist=None, min_count=2,
+                 stages=(), keep_tokens=False):
+        self.sent_tokenizer = sent_tokenizer
+        self.tagger = tagger
+        self.stemmer = stemmer
+        self.stoplist = stoplist
+        self.min_count = min_count
+        self.timings = {}
+        self._pos_text = None
+        self._chunked_text = None
+        self._collocation_text = None
         self.text = document  # Original text
-        self.sentences = self.split_sentences(self.text)  # Original text tokenized in sentences
-        self.words = self.split_words(self.sentences)
-        self.pos_text = self.tag(self.words)  # Original text with POS tagged words
-        # TODO chunk
-        self._clean_text = self.clean(self.words)  # Remove stop words and punctuation
-        self._stemmed_text = self.stem(self._clean_text)  # Word stemming
-        self.dictionary_text = self._stemmed_text  # Find collocations
-
-    def strip(self, sentence, start_token='(', end_token=')'):
-        while True:
-            start = sentence.find(start_token)  # Find opening parenthesis
-            if start < 0:  # If there is not any
-                break  # break loop and go to next sentence
-            end = sentence.find(end_token) + 1  # Find closing parenthesis
-            if end < 0:  # If not found (?)
-                break  # break loop and go to next sentence
-            sentence = sentence[:start] + sentence[end:]  #
-        return sentence
+        self.sentences = self.timed('split_sentences', self.text)  # Original text tokenized in sentences
+        self.words = self.timed('split_words', self.sentences)
+        self._clean_text = self.timed('clean', self.words)  # Remove stop words and punctuation
+        stemmed_text = self.timed('stem', self._clean_text)  # Word stemming
+        self.stemmed_tokens = [token for sentence in stemmed_text for token in sentence] if keep_tokens else None
+        self._stemmed_text = self.timed('remove_rare', stemmed_text)
+        self.dictionary_text = self._stemmed_text
+        for stage in stages:
+            getattr(self, self.optional_stages[stage])
 
-    def split_sentences(self, text):
-        sentences = sent_tokenize(text)
+    optional_stages = {'tag': 'pos_text', 'chunk': 'chunked_text', 'collocations': 'collocation_text'}
+
+    def timed(self, stage, text):
+        """Runs the stage method on text and adds the time it took to timings."""
+        start = time.time()
+        result = getattr(self, stage)(text)
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.time() - start
+        return result
+
+    @property
+    def pos_text(self):
+        """Original text with POS tagged words"""
+        if self._pos_text is None:
+            self._pos_text = self.timed('tag', self.words)
+        return self._pos_text
+
+    @property
+    def chunked_text(self):
+        if self._chunked_text is None:
+            self._chunked_text = self.timed('chunk', self.pos_text)
+        return self._chunked_text
 
-        # Remove sentences in parenthesis
-        stripped_sentences = [self.strip(sentence, start_token='(', end_token=')')
-                              for sentence in sentences]
-        # Remove sentences in []
-        stripped_sentences = [self.strip(sentence, start_token='(', end_token=')')
-                              for sentence in stripped_sentences]
+    @property
+    def collocation_text(self):
+        """Stemmed text with the most likely bigrams joined"""
+        if self._collocation_text is None:
+            self._collocation_text = self.timed('collocations', self._stemmed_text)
+        return self._collocation_text
 
-        return stripped_sentences
+    def strip(self, sentence, brackets=BRACKETS):
+        """
+        Removes the spans in brackets, e.g. (...) and [...], nested ones included, in one scan.
+
+        Unbalanced brackets are kept, with the text that follows them, unless they are
+        inside a removed span: 'a (b [c) d) e' gives 'a  d) e'.
+        """
+        if brackets not in _bracket_patterns:
+            _bracket_patterns[brackets] = (re.compile('[%s]' % re.escape(''.join(brackets))),
+                                           dict((pair[1], pair[0]) for pair in brackets))
+        pattern, closing = _bracket_patterns[brackets]
+        pieces = []
+        opened = dict((pair[0], []) for pair in brackets)  # Stack of the indices in pieces of every opening bracket
+        last = 0  # Start of the text not yet copied in pieces
+        for match in pattern.finditer(sentence):
+            char, i = match.group(), match.start()
+            if char in closing:
+                stack = opened[closing[char]]
+                if stack:
+                    start = stack.pop()
+                    del pieces[start:]  # Remove the span
+                    # and the unmatched opening brackets of other kinds in it:
+                    for other in opened.itervalues():
+                        while other and other[-1] > start:
+                            other.pop()
+                    last = i + 1
+                continue
+            pieces.append(sentence[last:i])
+            opened[char].append(len(pieces))
+            pieces.append(char)
+            last = i + 1
+        pieces.append(sentence[last:])
+        return sentence[:0].join(pieces)
+
+    def split_sentences(self, text):
+        if self.sent_tokenizer is not None:
+            sentences = self.sent_tokenizer.tokenize(text)
+        else:
+            sentences = sent_tokenize(text)
+
+        # Remove sentences in parenthesis and []
+        return [self.strip(sentence) for sentence in sentences]
 
     def split_words(self, text):
         return [word_tokenize(sentence) for sentence in text]
 
     def tag(self, text):
+        if self.tagger is not None:
+            return [self.tagger.tag(token) for token in text]
         return [pos_tag(token) for token in text]
 
     def chunk(self, text):
@@ -82,9 +241,7 @@ class Preprocess():
         return t
 
     def clean(self, text):
-        stopwords = open('stopwords/english').read().splitlines()
-        punctuation = ['.', ',', ';', ':', '!', '?', '@', '#', '$', '%', '^', '&', '*', '(', ')', '_', '-', "'"]
-        stoplist = stopwords + punctuation
+        stoplist = self.stoplist if self.stoplist is not None else stopwords.load()
 
         stopfree_text = [[word.lower() for word in sentence if word.lower() not in stoplist]
                          for sentence in text]
@@ -92,17 +249,95 @@ class Preprocess():
         return stopfree_text
 
     def stem(self, text):
-        clean_text = self.clean(text)
-        stemmer = PorterStemmer()
-        tokens = [[stemmer.stem(word) for word in sentence] for sentence in clean_text]
+        """Stems the words of text, which should be already clean()ed."""
+        stemmer = self.stemmer if self.stemmer is not None else PorterStemmer()
+        return [[stemmer.stem(word) for word in sentence] for sentence in text]
+
+    def remove_rare(self, text):
+        """Removes the tokens that appear less than min_count times in text."""
+        if not self.min_count or self.min_count <= 1:
+            return text
+        counts = Counter(token for sentence in text for token in sentence)
+        return [[token for token in sentence if counts[token] >= self.min_count]
+                for sentence in text]
+
+
+class StreamPreprocess(Preprocess):
+    """
+    Preprocess in streaming mode.
+
+    Sentence splitting, tokenization, cleaning and stemming are chained generator
+    stages, so every sentence goes through the whole pipeline before the next one is
+    split. Only what scoring needs is kept: the spans of the sentences in the text and
+    their stemmed words (dictionary_text), and stemmed_tokens with keep_tokens. The
+    sentences are sliced out of the text again when they are read. POS tags are not used for scoring, so there is no
+    tagging stage.
+
+    Example of use:
+        >>> ppd = StreamPreprocess(text)
+        >>> ppd.spans[0]
+        (0, 93)
+        >>> ppd.sentences[0] == Preprocess(text).sentences[0]
+        True
+    """
+
+    def __init__(self, document, sent_tokenizer=None, tagger=None, stemmer=None, stoplist=None, min_count=2,
+                 stages=(), keep_tokens=False):
+        if stages:
+            raise ValueError("StreamPreprocess keeps no word lists for the optional stages")
+        self.sent_tokenizer = sent_tokenizer if sent_tokenizer is not None else load_sent_tokenizer()
+        self.tagger = tagger
+        self.stemmer = stemmer if stemmer is not None else PorterStemmer()
+        self.stoplist = stoplist if stoplist is not None else stopwords.load()
+        self.min_count = min_count
+        self.text = document
+
+        start = time.time()
+        pipeline = self.iter_stemmed(self.iter_clean(self.iter_words(self.iter_sentences(document))))
+
+        self.spans = []
+        stemmed_text = []
+        for span, stemmed in pipeline:
+            self.spans.append(span)
+            stemmed_text.append(stemmed)
+        self.stemmed_tokens = [token for sentence in stemmed_text for token in sentence] if keep_tokens else None
+        self.dictionary_text = self.remove_rare(stemmed_text)
+        self.timings = {'stream': time.time() - start}
+        self.sentences = StreamSentences(self)
+
+    def iter_sentences(self, text):
+        for start, end in self.sent_tokenizer.span_tokenize(text):
+            yield (start, end), self.strip(text[start:end])
+
+    def iter_words(self, sentences):
+        for span, sentence in sentences:
+            yield span, word_tokenize(sentence)
+
+    def iter_clean(self, words):
+        for span, sentence in words:
+            yield span, [word.lower() for word in sentence if word.lower() not in self.stoplist]
+
+    def iter_stemmed(self, words):
+        for span, sentence in words:
+            yield span, [self.stemmer.stem(word) for word in sentence]
+
+
+class StreamSentences(object):
+    """The sentences of a StreamPreprocess, sliced out of its text when they are read."""
+
+    def __init__(self, ppd):
+        self.ppd = ppd
+
+    def __len__(self):
+        return len(self.ppd.spans)
 
-        # Remove tokens that appears only once
-        all_tokens = sum(tokens, [])
-        tokens_once = set(token for token in set(all_tokens) if all_tokens.count(token) == 1)
-        tokens = [[token for token in sentence if token not in tokens_once]
-                  for sentence in tokens]
+    def __getitem__(self, index):
+        start, end = self.ppd.spans[index]
+        return self.ppd.strip(self.ppd.text[start:end])
 
-        return tokens
+    def __iter__(self):
+        for index in xrange(len(self)):
+            yield self[index]
 
 
 if __name__ == "__main__":
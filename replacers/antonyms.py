@@ -8,8 +8,8 @@ __date__ = "Aug 30, 2013"
 __copyright__ = "Copyright (c) ..."
 __license__ = "Python"
 
-from nltk.corpus import wordnet
 from synonyms import WordReplacer
+from wordnet_cache import shared_cache
 
 
 class AntonymReplacer(object):
@@ -27,8 +27,17 @@ class AntonymReplacer(object):
         >>> sent = ["let's", 'not', 'uglify', 'our', 'code']
         >>> replacer.replace_negations(sent)
         ["let's", 'beautify', 'our', 'code']
+
+    The antonyms of a word are looked up in wordnet_cache, the WordNetCache shared by the
+    replacers unless another one is given.
     """
 
+    wordnet_cache = shared_cache
+
+    def __init__(self, wordnet_cache=None):
+        if wordnet_cache is not None:
+            self.wordnet_cache = wordnet_cache
+
     def replace(self, word, pos=None):
         """
         The method takes a single word and an optional part of speech tag, then looks up
@@ -43,15 +52,11 @@ class AntonymReplacer(object):
         :param pos: part of speech, one of 'v', 'n', 'r', 'a'
         :type pos: C{str}
         """
-        antonyms = set()
-        for syn in wordnet.synsets(word, pos=pos):
-            for lemma in syn.lemmas:
-                for antonym in lemma.antonyms():
-                    antonyms.add(antonym.name)
-                    if len(antonyms) == 1:
-                        return antonyms.pop()
-                    else:
-                        return None
+        antonyms = self.wordnet_cache.antonyms(word, pos)
+        if len(antonyms) == 1:
+            return iter(antonyms).next()
+        else:
+            return None
                     
     def replace_negations(self, sent):
         """
@@ -1,4 +1,7 @@
+import os
 import re
+import sre_constants
+import sre_parse
 
 
 class RegexpReplacerTypeError(Exception):
@@ -9,7 +12,7 @@ class RegexpReplacer(object):
     """
     RegexpReplacer replaces every instance of a replacement pattern
     with its corresponding substitution pattern.
-    
+
     Example of use:
         >>> from replacers.regexp import RegexpReplacer
         >>> replacer = RegexpReplacer()
@@ -17,7 +20,7 @@ class RegexpReplacer(object):
         'cannot is a contraction'
         >>> replacer.replace("I should've done that thing I didn't do")
         'I should have done that thing I did not do'
-        
+
     You can use your own replacement patterns in the form of:
         my_replacement_patterns = [
             (r'won\'t', 'will not'),
@@ -25,41 +28,89 @@ class RegexpReplacer(object):
             (r'(\w+)\'ll', '\g<1> will')]
     in the creation of RegexpReplacer object.
     Example of use:
-        >>> replacer = RegexpReplacer(my_replacement_patters)
+        >>> replacer = RegexpReplacer(patterns=my_replacement_patterns)
+
+    The rules are compiled once and applied one after the other, every rule to the
+    output of the rules before it. A rule is skipped when its string misses the literal
+    text that every match of the rule holds, as the apostrophes of the English rules,
+    and a string that holds the literal of no rule is not scanned again.
     """
 
-    def __init__(self, language='en'):
-        self.patterns = []
-        for rule in open('regexp_rules.%s' % language):
-            regexp, repl = rule.split(' ', 1)  # split on 1st space
-            #self.patterns.append((re.compile(regexp), repl.strip()))
-            self.patterns.append((regexp, repl.strip()))
+    def __init__(self, language='en', patterns=None):
+        if patterns is None:
+            patterns = []
+            # The rules are read from the package directory, not the current one:
+            fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'regexp_rules.%s' % language)
+            for rule in open(fname):
+                regexp, repl = rule.split(' ', 1)  # split on 1st space
+                patterns.append((regexp, repl.strip()))
+        self.patterns = patterns
+        self.rules = [(re.compile(pattern), substitution, required_literal(pattern))
+                      for pattern, substitution in patterns]
+        literals = [literal for _, _, literal in self.rules]
+        if literals and None not in literals:
+            # One scan for the literals of all the rules, longest first:
+            self._any_literal = re.compile('|'.join(re.escape(literal) for literal in
+                                                    sorted(set(literals), key=len, reverse=True)))
+        else:
+            self._any_literal = None
 
     def replace(self, text):
         """
-        Replaces every instance of a replacement search_pattern 
+        Replaces every instance of a replacement search_pattern
         with its corresponding substitution.
         """
-        if isinstance(text, str):
-            s = text
-            for (search_pattern, repl) in self.patterns:
-                (s, _) = re.subn(search_pattern, repl, s)
-            return s
+        if isinstance(text, basestring):
+            return self._replace(text)
         elif isinstance(text, list):
-            l = []
-            for s in text:
-                for (search_pattern, repl) in self.patterns:
-                    try:
-                        (s, _) = re.subn(search_pattern, repl, s)
-                    except TypeError:
-                        raise (RegexpReplacerTypeError, "A list of string objects expected.")
-                l.append(s)
-            return l
+            return self.replace_many(text)
         else:
-            raise (RegexpReplacerTypeError, "Argument should be string or list of strings")
+            raise RegexpReplacerTypeError("Argument should be string or list of strings")
+
+    def replace_many(self, sentences):
+        """Replaces the patterns in every string of the list sentences, and returns the list of the new strings."""
+        if not all(isinstance(s, basestring) for s in sentences):
+            raise RegexpReplacerTypeError("A list of string objects expected.")
+        any_literal = self._any_literal
+        if any_literal is None:
+            return [self._apply(s) for s in sentences]
+        search = any_literal.search
+        return [self._apply(s) if search(s) else s for s in sentences]
+
+    def _replace(self, s):
+        if self._any_literal is not None and not self._any_literal.search(s):
+            return s
+        return self._apply(s)
+
+    def _apply(self, s):
+        for regexp, repl, literal in self.rules:
+            if literal is None or literal in s:
+                s = regexp.sub(repl, s)
+        return s
+
+
+def required_literal(regexp):
+    """
+    Returns the longest run of literal characters that every match of regexp holds, or
+    None when there is none or regexp ignores case. Non ASCII characters end a run.
+    """
+    try:
+        parsed = sre_parse.parse(regexp)
+    except sre_constants.error:
+        return None
+    if parsed.pattern.flags & re.IGNORECASE:
+        return None
+    longest = run = ''
+    for op, av in parsed:
+        if op == sre_constants.LITERAL and av < 128:
+            run += chr(av)
+            longest = max(longest, run, key=len)
+        elif op != sre_constants.AT:  # Zero width assertions do not break a run
+            run = ''
+    return longest or None
 
 
 if __name__ == "__main__":
     replacer = RegexpReplacer()
     print replacer.replace("can't is a contraction")
-    print replacer.replace("I should've done that thing I didn't do")
\ No newline at end of file
+    print replacer.replace("I should've done that thing I didn't do")
@@ -1,14 +1,14 @@
 import re
-from nltk.corpus import wordnet
- 
- 
+from wordnet_cache import shared_cache
+
+
 class RepeatReplacer(object):
     """
     In everyday language, people are often not strictly grammatical. They will write things like
     "I looooooove it" in order to emphasize the word "love". But computers don't know that
     "looooooove" is a variation of "love" unless they are told. This replacer is a method for
     removing those annoying repeating characters in order to end up with a "proper" English word.
-    
+
     Example of use:
         >>> from replacers.repeat import RepeatReplacer
         >>> replacer = RepeatReplacer()
@@ -18,27 +18,94 @@ class RepeatReplacer(object):
         'ooh'
         >>> replacer.replace('goose')
         'goose'
+        >>> replacer = RepeatReplacer(vocabulary=set(['love', 'goose', 'ooh']))
+        >>> replacer.replace('looooove')
+        'love'
+
+    Whether a word is in WordNet is looked up in wordnet_cache, the WordNetCache shared by
+    the replacers unless another one is given. With a vocabulary (a set of words) the
+    words are looked up in it instead, and WordNet is not used.
+
+    A word is turned into the first known word of the sequence that removing one repeated
+    character at a time gives, the last repeated character first: "looooove", "loooove",
+    ..., "love". The sequence is built in one pass over the runs of repeated characters
+    of the word. With a vocabulary, its words are indexed by their form without repeated
+    characters, so that one lookup finds the known words of the whole sequence.
     """
 
-    def __init__(self):
+    def __init__(self, wordnet_cache=None, vocabulary=None):
         """
-        Initialize the repeat and replacement patterns used for substitution.  
+        Initialize the repeat and replacement patterns used for substitution.
         """
+        self.wordnet_cache = wordnet_cache if wordnet_cache is not None else shared_cache
+        self.vocabulary = vocabulary
         self._repeat_pattern = r'(\w*)(\w)\2(\w*)'
         # Zero or more starting characters
         # A single character (\w), followed by another instance of that character \2.
         # Zero or more ending characters
         self._repeat_regexp = re.compile(self._repeat_pattern)
         self._repl = r'\1\2\3'
-        
+        self._word_regexp = re.compile(r'\w*\Z')
+        self._run_regexp = re.compile(r'(\w)\1*')
+        self._collapsed = {}  # {word without repeated characters: words of the vocabulary}
+        if vocabulary is not None:
+            for known in vocabulary:
+                if self._word_regexp.match(known):
+                    self._collapsed.setdefault(self._run_regexp.sub(r'\1', known), []).append(known)
+
     def replace(self, word):
         """
         Replaces repeated characters in a given word. E.g. "looooove" becomes "love"
         """
-        if wordnet.synsets(word):
-            return word
-        repl_word = self._repeat_regexp.sub(self._repl, word)
-        if repl_word != word:
-            return self.replace(repl_word)
-        else:
-            return repl_word
+        if not self._word_regexp.match(word):
+            # The pattern removes a character from every run of word characters at once:
+            return self._replace_stepwise(word)
+        runs = [(match.group(1), len(match.group(0))) for match in self._run_regexp.finditer(word)]
+        if self.vocabulary is not None:
+            return self._replace_collapsed(word, runs)
+        for candidate in self._candidates(runs):
+            if self.wordnet_cache.has_synsets(candidate):
+                return candidate
+        return candidate
+
+    def _candidates(self, runs):
+        """Yields the words that removing one repeated character at a time from runs gives, runs first."""
+        lengths = [length for _, length in runs]
+        yield ''.join(char * length for char, length in runs)
+        for i in xrange(len(runs) - 1, -1, -1):
+            for length in xrange(lengths[i] - 1, 0, -1):
+                lengths[i] = length
+                yield ''.join(char * length for (char, _), length in zip(runs, lengths))
+
+    def _replace_collapsed(self, word, runs):
+        """
+        The known word of the vocabulary that comes first in the sequence of word: among the
+        ones with the same characters, the one with the fewest characters removed that keeps
+        the runs before some run i, and one character of every run after it.
+        """
+        best, best_removed = None, None
+        for known in self._collapsed.get(''.join(char for char, _ in runs), ()):
+            lengths = [len(match.group(0)) for match in self._run_regexp.finditer(known)]
+            i = len(runs)
+            while i > 0 and lengths[i - 1] == 1:
+                i -= 1
+            # Runs before i are kept, run i - 1 may be shortened, and the ones after it are of one character:
+            if i and (lengths[:i - 1] != [length for _, length in runs[:i - 1]] or lengths[i - 1] > runs[i - 1][1]):
+                continue
+            removed = len(word) - len(known)
+            if best_removed is None or removed < best_removed:
+                best, best_removed = known, removed
+        return best if best is not None else ''.join(char for char, _ in runs)
+
+    def _replace_stepwise(self, word):
+        while not self._known(word):
+            repl_word = self._repeat_regexp.sub(self._repl, word)
+            if repl_word == word:
+                break
+            word = repl_word
+        return word
+
+    def _known(self, word):
+        if self.vocabulary is not None:
+            return word in self.vocabulary
+        return self.wordnet_cache.has_synsets(word)
@@ -3,46 +3,10 @@ __version__ = 0.1
 __date__ = '11/5/13'
 
 import csv
-import enchant
 import yaml
-from nltk.metrics import edit_distance
-
-
-class SpellingReplacer(object):
-    """ Corrects minor spelling issues using Enchant  - a spelling correction API
-
-        Create an instance giving the language dictionary
-        and the maximum number of different characters
-        between word and dictionary's suggestion.
-
-        Available languages depend on your installation.
-
-        Example of use:
-            >>> from replacers import SpellingReplacer
-            >>> replacer = SpellingReplacer()
-            >>> replacer.replace('cookbok')
-            'cookbook'
-    """
-
-    def __init__(self, dict_name='en', max_dist=2):
-        self.spell_dict = enchant.Dict(dict_name)
-        self.max_dist = max_dist
-
-    def replace(self, word):
-        if self.spell_dict.check(word):  # If the word is in the dictionary, the it is correct
-            return word  # return in
-        suggestions = self.spell_dict.suggest(word)  # Ge a suggestion list
-        if suggestions and edit_distance(word, suggestions[0]) <= self.max_dist:
-            # If word and 1st suggestion has maximum max_dist different characters
-            return suggestions[0]  # return 1st suggestion
-        else:
-            return word  # return original word
-
-
-class CustomSpellingReplacer(SpellingReplacer):
-    def __init__(self, dict_name='en', custom_dict='custom_dict.txt', max_dist=2):
-        self.spell_dict = enchant.DictWithPWL(dict_name, custom_dict)
-        self.max_dist = max_dist
+from wordmap import WordMap
+# One spelling corrector for both modules, with its cache and edit distance bound:
+from spelling import SpellingReplacer, CustomSpellingReplacer, SymSpellReplacer
 
 
 class WordReplacer(object):
@@ -74,7 +38,7 @@ class CsvWordReplacer(WordReplacer):
         for line in csv.reader(open(fname)):
             word, syn = line
             word_map[word] = syn
-        super(CSVWordReplacer, self).__init__(word_map)
+        super(CsvWordReplacer, self).__init__(word_map)
 
 
 class YamlWordReplacer(WordReplacer):
@@ -86,4 +50,16 @@ class YamlWordReplacer(WordReplacer):
 
     def __init__(self, fname):
         word_map = yaml.load(open(fname))
-        super(YamlWordReplacer, self).__init__(word_map)
\ No newline at end of file
+        super(YamlWordReplacer, self).__init__(word_map)
+
+
+class MmapWordReplacer(WordReplacer):
+    """ Looks up the pairs in a word map compiled by wordmap.py from a csv or yaml file.
+
+        The file is memory-mapped instead of parsed, and shared by the processes that open it.
+        It is compiled with
+        python wordmap.py abbreviations_en.yaml abbreviations_en.wmap
+    """
+
+    def __init__(self, fname):
+        super(MmapWordReplacer, self).__init__(WordMap(fname))
@@ -1,34 +1,162 @@
-import enchant
-from nltk.metrics import edit_distance
+import codecs
+
+from lru import LRUCache
+
+try:
+    import enchant
+except ImportError:  # Only SymSpellReplacer works without Enchant
+    enchant = None
+
 
 class SpellingReplacer(object):
     """
     Corrects minor spelling issues using Enchant - a spelling correction API
-    
+
     Example of use:
         >>> from replacers.spelling import SpellingReplacer
         >>> replacer = SpellingReplacer()
         >>> replacer.replace('cookbok')
         'cookbook'
-    """
 
+    The corrections of the last cache_size words (0 for no cache) are cached in an LRUCache,
+    so a typo seen before costs neither an Enchant check nor a suggestion list. hits and
+    misses count the lookups.
+    dict_name is the language of the dictionary, or an Enchant dictionary.
+    """
 
-    def __init__(self, dict_name='en', max_dist=2):
-        self.spell_dict = enchant.Dict(dict_name)
+    def __init__(self, dict_name='en', max_dist=2, cache_size=100000):
+        if isinstance(dict_name, basestring):
+            if enchant is None:
+                raise ImportError('SpellingReplacer needs PyEnchant; SymSpellReplacer works without it')
+            dict_name = enchant.Dict(dict_name)
+        self.spell_dict = dict_name
         self.max_dist = max_dist
-        
+        self.cache = LRUCache(cache_size)
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
     def replace(self, word):
+        return self.cache.lookup(word, self._correct)
+
+    def _correct(self, word):
         if self.spell_dict.check(word):
             return word
         suggestions = self.spell_dict.suggest(word)
-        if suggestions and edit_distance(word, suggestions[0]) <= self.max_dist:
+        if suggestions and bounded_edit_distance(word, suggestions[0], self.max_dist) <= self.max_dist:
             return suggestions[0]
         else:
             return word
-        
+
+
 class CustomSpellingReplacer(SpellingReplacer):
-    
-    def __init__(self, dict_name='en', custom_dict='custom_dict.txt', max_dist=2):
-        self.spell_dict = enchant.DictWithPWL(dict_name, custom_dict)
-        self.max_dist = max_dist
-        
+
+    def __init__(self, dict_name='en', custom_dict='custom_dict.txt', max_dist=2, cache_size=100000):
+        if enchant is None:
+            raise ImportError('CustomSpellingReplacer needs PyEnchant')
+        super(CustomSpellingReplacer, self).__init__(enchant.DictWithPWL(dict_name, custom_dict), max_dist,
+                                                     cache_size)
+
+
+class SymSpellReplacer(SpellingReplacer):
+    """
+    Corrects minor spelling issues against a local word list, without Enchant, with a
+    precomputed index of deletions as SymSpell does.
+
+    Every word of the list is indexed under every string that deleting up to max_dist of
+    its characters gives. Two words are at most max_dist edits apart only if such strings
+    of them meet, so the candidates of a word are the words indexed under its own
+    deletions, and only they are measured. The correction is the closest candidate, the
+    most frequent one of the closest, the first one in the list of equally frequent ones.
+    The index holds some tens of strings per word for max_dist=2.
+
+    words is an iterable of words, of (word, count) pairs, or a {word: count} dictionary.
+
+    Example of use:
+        >>> from replacers.spelling import SymSpellReplacer
+        >>> replacer = SymSpellReplacer.load('words.txt')
+        >>> replacer.replace('cookbok')
+        'cookbook'
+    """
+
+    def __init__(self, words, max_dist=2, cache_size=100000):
+        super(SymSpellReplacer, self).__init__(None, max_dist, cache_size)
+        if isinstance(words, dict):
+            words = words.iteritems()
+        self.words = {}  # {word: (-count, rank)}, the sort key of the corrections
+        self.index = {}
+        for rank, word in enumerate(words):
+            word, count = word if isinstance(word, tuple) else (word, 0)
+            if word in self.words:
+                continue
+            self.words[word] = (-count, rank)
+            for deletion in _deletions(word, max_dist):
+                self.index.setdefault(deletion, []).append(word)
+
+    @classmethod
+    def load(cls, fname, max_dist=2, cache_size=100000):
+        """Reads a word list of one word, or word and count separated by white space, per line."""
+        words = []
+        f = codecs.open(fname, encoding='utf-8')
+        for line in f:
+            fields = line.split()
+            if fields:
+                words.append((fields[0], int(fields[1])) if len(fields) > 1 else fields[0])
+        f.close()
+        return cls(words, max_dist, cache_size)
+
+    def _correct(self, word):
+        if word in self.words:
+            return word
+        best, best_key = word, None
+        for candidate in set(candidate for deletion in _deletions(word, self.max_dist)
+                             for candidate in self.index.get(deletion, ())):
+            dist = bounded_edit_distance(word, candidate, self.max_dist)
+            if dist <= self.max_dist:
+                key = (dist,) + self.words[candidate]
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+        return best
+
+
+def _deletions(word, max_dist):
+    """The set of strings that deleting up to max_dist characters of word gives, word included."""
+    deletions = set([word])
+    level = [word]
+    for _ in xrange(max_dist):
+        level = set(s[:i] + s[i + 1:] for s in level for i in xrange(len(s)))
+        deletions.update(level)
+    return deletions
+
+
+def bounded_edit_distance(s1, s2, max_dist):
+    """
+    The Levenshtein edit distance of nltk.metrics.edit_distance between s1 and s2, or
+    max_dist + 1 if it is larger than max_dist.
+
+    Only the cells of the table within max_dist of its diagonal are computed, and the
+    computation stops at the first row whose cells are all larger than max_dist.
+    """
+    len1, len2 = len(s1), len(s2)
+    beyond = max_dist + 1
+    if abs(len1 - len2) > max_dist:
+        return beyond
+    previous = [min(j, beyond) for j in xrange(len2 + 1)]
+    for i in xrange(1, len1 + 1):
+        char = s1[i - 1]
+        current = [beyond] * (len2 + 1)
+        current[0] = row_min = min(i, beyond)
+        for j in xrange(max(1, i - max_dist), min(len2, i + max_dist) + 1):
+            dist = min(previous[j - 1] + (char != s2[j - 1]), previous[j] + 1, current[j - 1] + 1, beyond)
+            current[j] = dist
+            if dist < row_min:
+                row_min = dist
+        if row_min > max_dist:
+            return beyond
+        previous = current
+    return previous[len2]
@@ -14,6 +14,8 @@ __license__ = "Python"
 import csv
 import yaml
 
+from wordmap import WordMap
+
 
 class WordReplacerWrongDict(Exception):
     pass
@@ -34,7 +36,7 @@ class WordReplacer(object):
         'happy'
     """
     def __init__(self, word_map):
-        if not isinstance(word_map, dict):
+        if not isinstance(word_map, (dict, WordMap)):
             raise(WordReplacerWrongDict, "Initialize with a dictionary of words {'key': 'value'}")
         
         self.word_map = word_map
@@ -63,7 +65,7 @@ class CsvWordReplacer(WordReplacer):
         for line in csv.reader(open(fname)):
             word, syn = line
             word_map[word] = syn
-            super(CsvWordReplacer, self).__init__(word_map)
+        super(CsvWordReplacer, self).__init__(word_map)
 
 
 class YamlWordReplacer(WordReplacer):
@@ -85,3 +87,24 @@ class YamlWordReplacer(WordReplacer):
     def __init__(self, fname):
         word_map = yaml.load(open(fname))
         super(YamlWordReplacer, self).__init__(word_map)
+
+
+class MmapWordReplacer(WordReplacer):
+    """
+    MmapWordReplacer uses a word map compiled by replacers/wordmap.py to make word
+    replacements. The file is memory-mapped instead of parsed, so it opens in a few
+    milliseconds and all the processes that open it share one copy.
+    Compile a csv or yaml file once with:
+        python replacers/wordmap.py synonyms.yaml synonyms.wmap
+
+    Example of use:
+        >>> from replacers.synonyms import MmapWordReplacer
+        >>> replacer = MmapWordReplacer('synonyms.wmap')
+        >>> replacer.replace('bday')
+        'birthday'
+        >>> replacer.replace('happy')
+        'happy'
+    """
+
+    def __init__(self, fname):
+        super(MmapWordReplacer, self).__init__(WordMap(fname))
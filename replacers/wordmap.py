@@ -0,0 +1,189 @@
+"""
+A compiled word map, read from a memory-mapped file instead of a dictionary.
+
+CsvWordReplacer and YamlWordReplacer parse their file into a dictionary every time they
+are constructed, and every worker keeps its own copy. A word map compiled once with
+compile_word_map is opened by WordMap in a few milliseconds, whatever its size: nothing
+is parsed, the file is mapped read-only, and the operating system shares its pages
+between all the processes that open it.
+
+The file is a table of the pairs sorted by word, with an open addressing hash index:
+
+    header   magic 'WMAP', version, number of pairs, number of slots    <4sIII
+    slots    number of the pair + 1 per slot, 0 for an empty slot     <I each
+    pairs    offset of the word, length of the word, length of the
+             synonym, which follows the word                          <III each
+    strings  the words and synonyms, encoded in UTF-8
+
+A word is hashed with zlib.crc32 to its slot, and the slots are probed linearly until
+the pair of the word or an empty slot is found. There are at least twice as many slots as
+pairs, so a lookup reads one or two slots.
+
+Example of use:
+    $ python replacers/wordmap.py replacers/abbreviations_en.yaml abbreviations_en.wmap
+    >>> from replacers.wordmap import WordMap
+    >>> word_map = WordMap('abbreviations_en.wmap')
+    >>> word_map.get('bday', 'bday'), 'happy' in word_map
+    ('birtday', False)
+"""
+
+__author__ = "Aris Fergadis"
+__version__ = 0.1
+
+import csv
+import mmap
+import os
+import struct
+import zlib
+
+MAGIC = b'WMAP'
+VERSION = 1
+_HEADER = struct.Struct('<4sIII')
+_SLOT = struct.Struct('<I')
+_PAIR = struct.Struct('<III')
+
+
+class WordMapError(Exception):
+    pass
+
+
+def _hash(key):
+    return zlib.crc32(key) & 0xffffffff
+
+
+def _encode(text):
+    return text.encode('utf-8') if isinstance(text, unicode) else text
+
+
+def compile_word_map(word_map, fname):
+    """Writes the {word: synonym} dictionary word_map to fname in the format of WordMap."""
+    pairs = sorted((_encode(word), _encode(syn)) for word, syn in word_map.iteritems())
+    n_slots = 1
+    while n_slots <= 2 * len(pairs):
+        n_slots *= 2
+    slots = [0] * n_slots
+    for number, (word, _) in enumerate(pairs):
+        slot = _hash(word) & (n_slots - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (n_slots - 1)
+        slots[slot] = number + 1
+    offset = _HEADER.size + _SLOT.size * n_slots + _PAIR.size * len(pairs)
+    f = open(fname, 'wb')
+    f.write(_HEADER.pack(MAGIC, VERSION, len(pairs), n_slots))
+    f.write(struct.pack('<%dI' % n_slots, *slots))
+    for word, syn in pairs:
+        f.write(_PAIR.pack(offset, len(word), len(syn)))
+        offset += len(word) + len(syn)
+    for word, syn in pairs:
+        f.write(word)
+        f.write(syn)
+    f.close()
+
+
+def load_word_map(fname):
+    """
+    Reads the {word: synonym} dictionary of a csv file (bday, birthday) or a yaml file
+    (bday: birthday), as CsvWordReplacer and YamlWordReplacer read it.
+
+    The pairs whose word or synonym is not a string are left out, because a word of a text
+    never matches them: yaml reads "no: number" as {False: 'number'}.
+    """
+    if os.path.splitext(fname)[1].lower() in ('.yaml', '.yml'):
+        import yaml
+        word_map = yaml.load(open(fname)) or {}
+    else:
+        word_map = {}
+        for line in csv.reader(open(fname)):
+            word, syn = line
+            word_map[word] = syn
+    return dict((word, syn) for word, syn in word_map.iteritems()
+                if isinstance(word, basestring) and isinstance(syn, basestring))
+
+
+class WordMap(object):
+    """
+    The read-only {word: synonym} mapping of a file written by compile_word_map.
+
+    Lookups take the str or unicode words a dictionary takes and give the synonym of the
+    same type. Iteration goes through the words in the order of their UTF-8 encoding.
+
+    Example of use:
+        >>> from replacers.wordmap import WordMap, compile_word_map
+        >>> compile_word_map({'bday': 'birthday'}, 'synonyms.wmap')
+        >>> word_map = WordMap('synonyms.wmap')
+        >>> word_map['bday'], word_map.get('happy', 'happy'), len(word_map)
+        ('birthday', 'happy', 1)
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        f = open(fname, 'rb')
+        try:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # An empty file cannot be mapped
+            raise WordMapError('%s is not a word map' % fname)
+        finally:
+            f.close()
+        if len(self._map) < _HEADER.size:
+            raise WordMapError('%s is not a word map' % fname)
+        magic, version, self._len, n_slots = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise WordMapError('%s is not a word map of version %d' % (fname, VERSION))
+        self._mask = n_slots - 1
+        self._pairs = _HEADER.size + _SLOT.size * n_slots
+
+    def close(self):
+        self._map.close()
+
+    def _find(self, key):
+        """The offset of the synonym of the encoded key and its length, or None."""
+        mm, mask, pairs = self._map, self._mask, self._pairs
+        read_slot, read_pair = _SLOT.unpack_from, _PAIR.unpack_from
+        slot_size, pair_size = _SLOT.size, _PAIR.size
+        slot = _hash(key) & mask
+        while True:
+            number = read_slot(mm, _HEADER.size + slot_size * slot)[0]
+            if not number:
+                return None
+            offset, key_len, syn_len = read_pair(mm, pairs + pair_size * (number - 1))
+            if key_len == len(key) and mm[offset:offset + key_len] == key:
+                return offset + key_len, syn_len
+            slot = (slot + 1) & mask
+
+    def get(self, word, default=None):
+        found = self._find(_encode(word))
+        if found is None:
+            return default
+        syn = self._map[found[0]:found[0] + found[1]]
+        return syn.decode('utf-8') if isinstance(word, unicode) else syn
+
+    def __getitem__(self, word):
+        syn = self.get(word)
+        if syn is None:
+            raise KeyError(word)
+        return syn
+
+    def __contains__(self, word):
+        return self._find(_encode(word)) is not None
+
+    def __len__(self):
+        return self._len
+
+    def iteritems(self):
+        for number in xrange(self._len):
+            offset, key_len, syn_len = _PAIR.unpack_from(self._map, self._pairs + _PAIR.size * number)
+            yield self._map[offset:offset + key_len], self._map[offset + key_len:offset + key_len + syn_len]
+
+    def __iter__(self):
+        return (word for word, _ in self.iteritems())
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print "Usage: python wordmap.py WORDS_FILE WORD_MAP_FILE"
+        print "  Compiles the pairs of the csv or yaml WORDS_FILE into WORD_MAP_FILE, for MmapWordReplacer."
+    else:
+        pairs = load_word_map(sys.argv[1])
+        compile_word_map(pairs, sys.argv[2])
+        print "%d pairs written to %s" % (len(pairs), sys.argv[2])
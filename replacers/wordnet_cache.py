@@ -0,0 +1,188 @@
+"""
+Cached WordNet lookups, shared by the replacers.
+
+RepeatReplacer asks WordNet whether a word has synsets at every step of its recursion,
+and AntonymReplacer walks every synset and lemma of the word after a "not". The same
+common words are looked up again and again, so the answers are kept in a bounded cache
+keyed by (word, part of speech).
+
+The lookups can also be answered by a WordNetIndex saved to disk once: the lemma names
+and exception lists that WordNet's morphy needs, and the antonyms of every lemma. A
+worker that loads the index never loads the WordNet corpus reader.
+"""
+
+__author__ = "Aris Fergadis"
+__version__ = 0.1
+
+import cPickle
+
+from nltk.corpus import wordnet
+
+from lru import LRUCache
+
+POS_LIST = ('n', 'v', 'a', 'r')
+
+
+def _get(value):
+    """NLTK 3 turned the attributes of synsets and lemmas into methods."""
+    return value() if callable(value) else value
+
+
+class WordNetCache(object):
+    """
+    Remembers whether the last maxsize (word, pos) pairs looked up have synsets in WordNet,
+    and their antonyms, in an LRUCache. maxsize=0 remembers none.
+
+    The lookups go to index (a WordNetIndex) if there is one, else to the WordNet corpus
+    reader of NLTK. hits and misses count the lookups, as in preprocess.CachedStemmer.
+
+    Example of use:
+        >>> from replacers.wordnet_cache import WordNetCache, WordNetIndex
+        >>> cache = WordNetCache()
+        >>> cache.has_synsets('looove'), cache.antonyms('uglify')
+        (False, frozenset(['beautify']))
+        >>> WordNetIndex.build().save('wordnet.idx')
+        >>> cache = WordNetCache(index=WordNetIndex.load('wordnet.idx'))
+        >>> shared_cache.index = WordNetIndex.load('wordnet.idx')  # For the replacers
+    """
+
+    def __init__(self, maxsize=100000, index=None):
+        self.index = index
+        self.cache = LRUCache(maxsize)
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def has_synsets(self, word, pos=None):
+        """True if wordnet.synsets(word, pos) is not empty."""
+        return self._lookup('synsets', word, pos)
+
+    def antonyms(self, word, pos=None):
+        """The frozenset of the names of the antonyms of the lemmas of wordnet.synsets(word, pos)."""
+        return self._lookup('antonyms', word, pos)
+
+    def _lookup(self, kind, word, pos):
+        return self.cache.lookup((kind, word, pos), self._compute)
+
+    def _compute(self, key):
+        kind, word, pos = key
+        source = self.index if self.index is not None else self
+        return source._has_synsets(word, pos) if kind == 'synsets' else source._antonyms(word, pos)
+
+    def _has_synsets(self, word, pos):
+        return bool(wordnet.synsets(word, pos=pos))
+
+    def _antonyms(self, word, pos):
+        return frozenset(_get(antonym.name) for syn in wordnet.synsets(word, pos=pos)
+                         for lemma in _get(syn.lemmas) for antonym in lemma.antonyms())
+
+
+class WordNetIndex(object):
+    """
+    The part of WordNet that WordNetCache needs, to be saved to disk once and loaded by
+    every worker instead of the WordNet corpus reader.
+
+    lemmas: {pos: frozenset of lemma names}
+    exceptions: {pos: {inflected form: list of base forms}}, the morphy exception lists
+    substitutions: {pos: list of (suffix, replacement)}, the morphy rules
+    antonyms: {pos: {lemma name: tuple of the antonyms of its lemmas}}, without empty ones
+
+    Words are looked up as wordnet.synsets looks them up: lowercased, and turned into
+    lemma names by the same rules and exception lists as WordNet's morphy.
+    """
+
+    def __init__(self, lemmas, exceptions, substitutions, antonyms):
+        self.lemmas = lemmas
+        self.exceptions = exceptions
+        self.substitutions = substitutions
+        self.antonyms = antonyms
+
+    @classmethod
+    def build(cls, reader=None):
+        """Builds the index from the WordNet corpus reader of NLTK."""
+        reader = reader if reader is not None else wordnet
+        lemma_map = reader._lemma_pos_offset_map
+        get_synset = getattr(reader, 'synset_from_pos_and_offset', None) or reader._synset_from_pos_and_offset
+        lemmas = {}
+        antonyms = {}
+        for pos in POS_LIST:
+            names = [name for name, offsets in lemma_map.iteritems() if pos in offsets]
+            lemmas[pos] = frozenset(names)
+            antonyms[pos] = {}
+            for name in names:
+                found = set(_get(antonym.name) for offset in lemma_map[name][pos]
+                            for lemma in _get(get_synset(pos, offset).lemmas) for antonym in lemma.antonyms())
+                if found:
+                    antonyms[pos][name] = tuple(sorted(found))
+        exceptions = dict((pos, dict(reader._exception_map[pos])) for pos in POS_LIST)
+        substitutions = dict((pos, list(reader.MORPHOLOGICAL_SUBSTITUTIONS[pos])) for pos in POS_LIST)
+        return cls(lemmas, exceptions, substitutions, antonyms)
+
+    def save(self, fname):
+        f = open(fname, 'wb')
+        cPickle.dump({'lemmas': self.lemmas, 'exceptions': self.exceptions, 'substitutions': self.substitutions,
+                      'antonyms': self.antonyms}, f, cPickle.HIGHEST_PROTOCOL)
+        f.close()
+
+    @classmethod
+    def load(cls, fname):
+        f = open(fname, 'rb')
+        state = cPickle.load(f)
+        f.close()
+        return cls(state['lemmas'], state['exceptions'], state['substitutions'], state['antonyms'])
+
+    def _has_synsets(self, word, pos):
+        word = word.lower()
+        return any(self._morphy(word, p) for p in self._pos_list(pos))
+
+    def _antonyms(self, word, pos):
+        word = word.lower()
+        return frozenset(antonym for p in self._pos_list(pos) for name in self._morphy(word, p)
+                         for antonym in self.antonyms[p].get(name, ()))
+
+    def _pos_list(self, pos):
+        # Adjective satellites are listed with the adjectives:
+        return POS_LIST if pos is None else ['a' if p == 's' else p for p in pos]
+
+    def _morphy(self, form, pos):
+        """The lemma names of form for pos, as WordNetCorpusReader._morphy finds them."""
+        lemmas = self.lemmas[pos]
+        substitutions = self.substitutions[pos]
+
+        def apply_rules(forms):
+            return [form[:-len(old)] + new for form in forms for old, new in substitutions if form.endswith(old)]
+
+        def filter_forms(forms):
+            result = []
+            for form in forms:
+                if form in lemmas and form not in result:
+                    result.append(form)
+            return result
+
+        exceptions = self.exceptions[pos]
+        if form in exceptions:
+            return filter_forms([form] + exceptions[form])
+        forms = apply_rules([form])
+        results = filter_forms([form] + forms)
+        while forms and not results:
+            forms = apply_rules(forms)
+            results = filter_forms(forms)
+        return results
+
+
+shared_cache = WordNetCache()
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 2:
+        print "Usage: python -m replacers.wordnet_cache INDEX_FILE"
+        print "  Builds the WordNetIndex of the WordNet corpus of NLTK and saves it to INDEX_FILE."
+        print "  Workers load it with: shared_cache.index = WordNetIndex.load(INDEX_FILE)"
+    else:
+        WordNetIndex.build().save(sys.argv[1])
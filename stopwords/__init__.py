@@ -0,0 +1,35 @@
+"""
+Stopword lists, one file per language in this package (e.g. stopwords/english).
+
+The lists are read once per process and kept as frozensets, so that membership tests
+are constant time and the same set can be shared by many documents and handed to
+worker processes.
+"""
+
+__author__ = 'aris'
+__version__ = 0.1
+__date__ = '11/3/13'
+
+import os
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+PUNCTUATION = frozenset(['.', ',', ';', ':', '!', '?', '@', '#', '$', '%', '^', '&', '*', '(', ')', '_', '-', "'"])
+
+_stoplists = {}
+
+
+def load(language='english', path=None, punctuation=True):
+    """
+    Returns the stopwords of language, plus the punctuation marks, as a frozenset.
+
+    The list is read from the file named after the language in this package, or from
+    path when it is given, the first time it is asked for; later calls return the
+    same set.
+    """
+    fname = os.path.abspath(path if path is not None else os.path.join(DIRECTORY, language))
+    key = (fname, punctuation)
+    if key not in _stoplists:
+        with open(fname) as f:
+            words = frozenset(f.read().splitlines())
+        _stoplists[key] = words | PUNCTUATION if punctuation else words
+    return _stoplists[key]
@@ -86,15 +86,101 @@ __version__ = "0.2a"
 __copyright__ = "Copyright (c) 2009 Elias Soong"
 __license__ = "New-style BSD"
 
+import hashlib
 import re
+import struct
+import time
+import urlparse
+from fractions import Fraction
 from lxml import etree
-#_parser = etree.HTMLParser()
-#parse = lambda x: etree.fromstring(x, _parser)
+import lxml.html
 # SoupParser is more robust than lxml's default html parser sometimes:
 import lxml.html.soupparser
 
+from lru import LRUCache
 
-def extMainText(html, threshold=0.5, filterMode=False):
+# The parser backends, the native lxml.html one, etree.HTMLParser in recover mode and soupparser:
+PARSERS = ('lxml', 'recover', 'soup')
+PARSER = 'soup'
+
+
+class HtmlParser(object):
+    """
+    Parses HTML with one of the PARSERS backends, and falls back to soupparser when
+    a native parse fails or looks broken.
+
+    A parse looks broken when it keeps less than minTextRatio of the text found between
+    the tags of the html, as when lxml stops at a stray byte. The time spent in every
+    backend, the number of parses and the number of fallbacks are counted in stats.
+
+    Example of use:
+        >>> parser = HtmlParser('lxml')
+        >>> mtHtml = extMainText(html, parser=parser)
+        >>> text = get_text(mtHtml, parser=parser)
+        >>> parser.report()
+        {'lxml': {'parses': 2, 'seconds': 0.0031, 'fallbacks': 0, 'fallbackRate': 0.0}, ...}
+    """
+
+    def __init__(self, backend=PARSER, minTextRatio=0.5):
+        assert backend in PARSERS, 'Unknown parser backend %s' % backend
+        self.backend = backend
+        self.minTextRatio = minTextRatio
+        self.stats = dict((name, {'parses': 0, 'seconds': 0.0, 'fallbacks': 0}) for name in PARSERS)
+        self._recoverParser = etree.HTMLParser(recover=True)
+
+    def parse(self, html):
+        """Return: the root element of html"""
+        root = self._timed(self.backend, html)
+        if self.backend != 'soup' and (root == None or self.looksBroken(root, html)):
+            self.stats[self.backend]['fallbacks'] += 1
+            root = self._timed('soup', html)
+        return root
+
+    def _timed(self, backend, html):
+        start = time.time()
+        try:
+            if backend == 'lxml':
+                root = lxml.html.document_fromstring(html)
+            elif backend == 'recover':
+                root = etree.fromstring(html, self._recoverParser)
+            else:
+                # If we prepare a BeautifulSoup instance manually and pass it to lxml.html.soupparser.convert_tree()
+                # then this func work well as 'import ExtMainText' but will throw strange error for
+                # 'import jqhtml.ExtMainText'.
+                root = lxml.html.soupparser.fromstring(html)
+        except (etree.LxmlError, ValueError):
+            if backend == 'soup':
+                raise
+            root = None
+        self.stats[backend]['parses'] += 1
+        self.stats[backend]['seconds'] += time.time() - start
+        return root
+
+    def looksBroken(self, root, html):
+        """Check if root keeps less than minTextRatio of the non-space text between the tags of html."""
+        htmlTextLen = len(_spaceRe.sub('', _entityRe.sub('&', _tagRe.sub('', html))))
+        treeTextLen = len(_spaceRe.sub('', etree.tostring(root, method='text', encoding=unicode)))
+        return treeTextLen < self.minTextRatio * htmlTextLen
+
+    def report(self):
+        """
+        Return: {backend: {'parses': number of parses, 'seconds': time spent parsing,
+        'fallbacks': number of fallbacks to soupparser, 'fallbackRate': fallbacks per parse}}
+        """
+        report = {}
+        for name, stats in self.stats.iteritems():
+            fallbackRate = float(stats['fallbacks']) / stats['parses'] if stats['parses'] else 0.0
+            report[name] = dict(stats, fallbackRate=fallbackRate)
+        return report
+
+
+_tagRe = re.compile(r'<[^>]*>')
+_entityRe = re.compile(r'&#?\w+;')
+_spaceRe = re.compile(r'\s+', re.UNICODE)
+_defaultParser = HtmlParser()
+
+
+def extMainText(html, threshold=0.5, filterMode=False, parser=None, template=None):
     """
     Parses HTML and keeps only main text parts.
 
@@ -102,24 +188,47 @@ def extMainText(html, threshold=0.5, filterMode=False):
     html - Input html text, MUST BE UNICODE!
     threshold - The density threshold to distinguish major content & others.
     filterMode - Use normal 'Extract' mode or the other 'Filter' mode.
+    parser - The HtmlParser to parse html with (Default: soupparser).
+    template - The PageTemplate of the site of html, to skip its known boilerplate (Default: None).
 
     RETURN:
     html fragments of main text
     """
+    return ''.join(map(_toString, extMainTree(html, threshold, filterMode, parser, template)))
+
+
+def extMainTree(html, threshold=0.5, filterMode=False, parser=None, template=None):
+    """
+    Parses HTML and keeps only main text parts, as extMainText, but returns the etree
+    branches of the main text instead of their html. Turn them into plain text with
+    get_tree_text, without parsing the html of extMainText again.
+
+    RETURN:
+    list of etree branches of main text
+    """
     html = _removeControlChars(html)
-    # If we prepare a BeautifulSoup instance manually and pass it to lxml.html.soupparser.convert_tree()
-    # then this func work well as 'import ExtMainText' but will throw strange error for 'import jqhtml.ExtMainText'.
-    root = lxml.html.soupparser.fromstring(html)
-    densDic = _calcDensity(root)
+    root = (parser or _defaultParser).parse(html)
+    densDic = _calcDensityBottomUp(root, template)
     if filterMode:
-        return _filterSpam(densDic, threshold)
+        trees = _filterSpamTrees(densDic, threshold)
     else:
         maxPart, textLen, maxPartChilds, textLenChilds = _getMainText(densDic, threshold)
         if textLenChilds > textLen:
-            return ''.join(
-                map(lambda tree: etree.tostring(tree, encoding=unicode) if tree != None else '', maxPartChilds))
+            trees = [tree for tree in maxPartChilds if tree != None]
         else:
-            return etree.tostring(maxPart, encoding=unicode) if maxPart != None else ''
+            trees = [maxPart] if maxPart != None else []
+    if template != None:
+        template.learn(densDic, trees)
+    return trees
+
+
+def _toString(tree):
+    """
+    Serialize an etree branch, without its tail when the tail holds text, because
+    the density dictionary keeps such a tail as a span branch of its own.
+    """
+    tail = tree.tail
+    return etree.tostring(tree, encoding=unicode, with_tail=not (tail and tail.strip()))
 
 #import unicodedata
 #all_chars = (unichr(i) for i in xrange(0x110000))
@@ -183,21 +292,77 @@ def _getMainText(densDic, threshold):
                     maxTree = tree
                     maxTextLen = textLen
                     # Find the largest html fragment under current tag branch:
-            for j in range(1, len(childTreesTmp) + 1):
-                for i in range(j):
-                    childTreesTmpTotalLen = sum(childTreesTmpTotalLens[i:j])
-                    childTreesTmpTextLen = sum(childTreesTmpTextLens[i:j])
-                    childTreesTmpTotalLen = 1 if childTreesTmpTotalLen == 0 else childTreesTmpTotalLen
-                    if float(childTreesTmpTextLen) / childTreesTmpTotalLen >= threshold:
-                        if childTreesTmpTextLen > maxChildTreesTextLen:
-                            maxChildTrees = childTreesTmp[i:j]
-                            maxChildTreesTextLen = childTreesTmpTextLen
-                            # Compare html fragment of current tag branch and the ones of children:
+            run = _getDenseRun(childTreesTmpTextLens, childTreesTmpTotalLens, threshold)
+            if run != None:
+                i, j, childTreesTmpTextLen = run
+                maxChildTrees = childTreesTmp[i:j]
+                maxChildTreesTextLen = childTreesTmpTextLen
+                # Compare html fragment of current tag branch and the ones of children:
             if maxChildSubTreesTextLen > maxChildTreesTextLen:
                 maxChildTrees, maxChildTreesTextLen = maxChildSubTrees, maxChildSubTreesTextLen
     return (maxTree, maxTextLen, maxChildTrees, maxChildTreesTextLen)
 
 
+_densityBounds = {}
+
+
+def _densityBound(threshold):
+    """
+    Turn the test float(textLen) / totalLen >= threshold into an exact integer one.
+
+    The float division rounds to nearest even, so it reaches threshold for every
+    textLen / totalLen from the midpoint p / q between threshold and the float below it.
+
+    Return: (p, q, strict), the test being textLen * q > totalLen * p if strict, else >=
+    """
+    if threshold not in _densityBounds:
+        if threshold <= 0:
+            _densityBounds[threshold] = (0, 1, False)
+        else:
+            bits = struct.unpack('<q', struct.pack('<d', threshold))[0]
+            below = struct.unpack('<d', struct.pack('<q', bits - 1))[0]
+            midpoint = (Fraction.from_float(below) + Fraction.from_float(threshold)) / 2
+            # A tie at the midpoint goes to the float with the even mantissa:
+            _densityBounds[threshold] = (midpoint.numerator, midpoint.denominator, bits % 2 == 1)
+    return _densityBounds[threshold]
+
+
+def _getDenseRun(textLens, totalLens, threshold):
+    """
+    Find the run of contiguous children with the largest text length among the runs
+    with text density not smaller than threshold, in O(k log k) for k children.
+
+    It gives the run the former search over every (i, j) would: the first one, for j
+    then i ascending, with the largest text length. With prefix sums, the run [i:j] is
+    dense enough when excess[j] - excess[i] >= 0, excess being text length * q - total
+    length * p; the longest one ending at j starts at the first i whose excess is not
+    larger than excess[j], found by bisection in the running minimum of excess.
+
+    Return: (i, j, text length) of childs[i:j], or None when no run has any text.
+    """
+    p, q, strict = _densityBound(threshold)
+    textLenSum = 0
+    textLenSums = [0]
+    excess = 0
+    minExcess = [0]  # Running minimum of excess[0..i]
+    best = None
+    for j in range(1, len(textLens) + 1):
+        textLenSum += textLens[j - 1]
+        textLenSums.append(textLenSum)
+        excess += textLens[j - 1] * q - totalLens[j - 1] * p
+        low, high = 0, j
+        while low < high:
+            middle = (low + high) // 2
+            if minExcess[middle] < excess or (minExcess[middle] == excess and not strict):
+                high = middle
+            else:
+                low = middle + 1
+        if low < j and textLenSum - textLenSums[low] > (best[2] if best != None else 0):
+            best = (low, j, textLenSum - textLenSums[low])
+        minExcess.append(min(minExcess[-1], excess))
+    return best
+
+
 def _filterSpam(densDic, threshold):
     """
     Walk through html document, drop off all etree branches that having low text
@@ -205,19 +370,29 @@ def _filterSpam(densDic, threshold):
 
     Return: html fragments of main text
     """
+    return ''.join(map(_toString, _filterSpamTrees(densDic, threshold)))
+
+
+def _filterSpamTrees(densDic, threshold):
+    """
+    Walk through html document, drop off all etree branches that having low text
+    density, and return the left etree branches.
+
+    Return: list of etree branches of main text
+    """
     dens, textLen, totalLen, tree = densDic['self']
     # If density is larger than threshold, keep and return current tag branch:
     if dens >= threshold:
-        return etree.tostring(tree, encoding=unicode)
+        return [tree]
     if str(tree.tag).lower() == 'br':
-        return etree.tostring(tree, encoding=unicode)
+        return [tree]
     # If density of current tag branch is too small, check its children:
     else:
-        frags = []
+        trees = []
         if densDic.has_key('child'):
             for childDic in densDic['child']:
-                frags.append(_filterSpam(childDic, threshold))
-        return ''.join(frags)
+                trees.extend(_filterSpamTrees(childDic, threshold))
+        return trees
 
 
 def _calcDensity(tree):
@@ -266,59 +441,488 @@ def _calcDensity(tree):
     return {'self': (density, countTextLen, totalLen, tree), 'child': dicList}
 
 
+_ignoredTags = ('<built-in function comment>', 'script', 'noscript', 'style')
+_escapedRe = re.compile(u'[&<>\r]')
+_nonAsciiRe = re.compile(u'[\ud800-\udbff][\udc00-\udfff]|[^\x00-\x7f]')
+
+
+def _calcDensityBottomUp(tree, template=None):
+    """
+    Calculate the same density dictionary as _calcDensity, in one bottom-up traversal
+    and without changing the tree.
+
+    _calcDensity serializes every branch to get its total length, so a node is serialized
+    again for each of its ancestors, and it moves text tails into span elements inserted
+    in the tree. Here the total length of a branch is summed from the lengths of its tags,
+    its escaped text and its children, and a text tail gets a span element that is left
+    out of the tree. Serialize the trees of the dictionary with _toString, so that such
+    tails are not written twice.
+
+    With a PageTemplate, the branches it knows as boilerplate of the site are not
+    walked: they get their lengths from the template, density 0.0 and no children.
+
+    Return: {'self': (tag density, length of pure text, total length of html tags and text, etree instance),
+    'child': list of density dics for child entities }
+    """
+    # Namespaced tags or attributes serialize with declarations that depend on where the
+    # branch is serialized from, so then every branch is serialized by itself as before:
+    plain = not tree.xpath('boolean(descendant-or-self::*[namespace-uri() != ""] | '
+                           'descendant-or-self::*/@*[namespace-uri() != ""])')
+    rawAttribs = tree.getroottree().docinfo.encoding != None
+    if template != None:
+        template.rawAttribs = rawAttribs if plain else None
+        if template.paths and plain:
+            return _measureDensity(tree, tree.tail, plain, rawAttribs, template, '')[0]
+    return _measureDensity(tree, tree.tail, plain, rawAttribs)[0]
+
+
+def _measureDensity(tree, tail, plain, rawAttribs, template=None, path=None):
+    """
+    Calculate the density dictionary of an etree branch whose tail is taken to be tail.
+    With a template, path is the template path of the parent of the branch.
+
+    Return: (density dic, length of the branch without its tail when an ancestor is serialized)
+    """
+    tag = tree.tag
+    if template != None:
+        path = _templatePath(path, tree)
+        if path in template.paths:
+            known = template.find(path, tree)
+            if known != None:
+                textLen, totalLen, length = known
+                if tail:
+                    textLen += len(tail.strip())
+                    totalLen += _escapedLen(tail)
+                return {'self': (0.0, textLen, totalLen, tree)}, length
+    text = tree.text
+    countTextLen = len(text.strip()) if text else 0
+    length = _escapedLen(text)
+    dicList = []
+    for subtree in tree:
+        subtreeTail = subtree.tail
+        if subtreeTail:
+            textNodeTextLen = len(subtreeTail.strip())
+            dic, subtreeLen = _measureDensity(subtree, '' if textNodeTextLen else subtreeTail, plain, rawAttribs,
+                                              template, path)
+            dicList.append(dic)
+            countTextLen += dic['self'][1]
+            length += subtreeLen + _escapedLen(subtreeTail)
+            # Treat subtree.tail as an independent etree branch:
+            if textNodeTextLen:
+                textNodeTotalLen = len(subtreeTail)
+                textTree = etree.Element('span')
+                textTree.text = subtreeTail
+                dicList.append(
+                    {'self': (float(textNodeTextLen) / textNodeTotalLen, textNodeTextLen, textNodeTotalLen, textTree)})
+                countTextLen += textNodeTextLen
+        else:
+            dic, subtreeLen = _measureDensity(subtree, subtreeTail, plain, rawAttribs, template, path)
+            dicList.append(dic)
+            countTextLen += dic['self'][1]
+            length += subtreeLen
+    if plain and isinstance(tag, basestring):
+        ownLength = length
+        attribs = tree.items()
+        if attribs:
+            ownTagsLen, tagsLen = _attribsLens(attribs, rawAttribs)
+            ownLength += ownTagsLen
+            length += tagsLen
+        # Start and end tags, or a self-closing tag:
+        tagsLen = 3 + len(tag) if text == None and not dicList else 5 + 2 * len(tag)
+        ownLength += tagsLen
+        length += tagsLen
+    else:
+        # Comments, processing instructions and entities, or a namespaced tree:
+        length = ownLength = len(etree.tostring(tree, encoding=unicode, with_tail=False))
+    tag = str(tag).lower()
+    if tag in _ignoredTags:
+        return {'self': (0.0, 0, 0, tree)}, length
+    if tail:
+        countTextLen += len(tail.strip())
+        totalLen = ownLength + _escapedLen(tail)
+    else:
+        totalLen = ownLength
+    if tag == 'br':
+        return {'self': (1.0 / totalLen, 1, totalLen, tree)}, length
+    density = float(countTextLen) / totalLen if totalLen != 0 else 0.0
+    return {'self': (density, countTextLen, totalLen, tree), 'child': dicList}, length
+
+
+def _escapedLen(text):
+    """Length of text once serialized, with &, <, > and carriage returns escaped."""
+    if not text:
+        return 0
+    if not _escapedRe.search(text):
+        return len(text)
+    return len(text) + 4 * (text.count('&') + text.count('\r')) + 3 * (text.count('<') + text.count('>'))
+
+
+def _attribsLens(attribs, rawAttribs):
+    """
+    Length of the attributes of an element when the element is serialized and when one
+    of its ancestors is.
+
+    libxml2 writes the non-ASCII characters of attributes as character references, but
+    for the attributes of descendants of the serialized element when the document has
+    an encoding.
+
+    Return: (length when serialized, length when an ancestor is)
+    """
+    length = 0
+    charRefsLen = 0
+    for name, value in attribs:
+        length += len(name) + 4 + _escapedLen(value) + \
+            5 * value.count('"') + 4 * value.count('\n') + 3 * value.count('\t')
+        if isinstance(value, unicode):
+            for char in _nonAsciiRe.findall(value):
+                if len(char) == 2:
+                    codePoint = 0x10000 + ((ord(char[0]) - 0xd800) << 10) + ord(char[1]) - 0xdc00
+                else:
+                    codePoint = ord(char)
+                charRefsLen += len('&#x%X;' % codePoint) - len(char)
+    return length + charRefsLen, length + (0 if rawAttribs else charRefsLen)
+
+
+class ThresholdTable(object):
+    """
+    Density thresholds of extMainText calibrated for every domain, instead of one
+    threshold for all sites.
+
+    The threshold of a domain separates the density distribution of a sample of its
+    pages in two classes, by Otsu's method: the densities of the text of every page,
+    each character with the density of the smallest branch holding it, are split where
+    the variance between the low (menus, ads, links) and the high (content) class is
+    largest. A page of a domain missing from the table, or of a subdomain of none of its
+    domains, gets the default threshold. The threshold of every host is cached at the
+    first lookup.
+
+    Example of use:
+        >>> table = ThresholdTable.calibrate(crawl.iter_html_documents('crawl.warc.gz'))
+        >>> table.save('thresholds.tsv')
+        >>> table = ThresholdTable.load('thresholds.tsv')
+        >>> mtHtml = extMainText(html, table.lookup('http://www.bbc.co.uk/news/health-25134722'))
+    """
+
+    def __init__(self, thresholds=None, default=0.5):
+        self.thresholds = thresholds if thresholds != None else {}  # {domain: (threshold, number of pages)}
+        self.default = default
+        self._cache = {}
+
+    @classmethod
+    def calibrate(cls, pages, default=0.5, minPages=3, maxPages=50, bins=100, parser=None):
+        """
+        Calibrate the threshold of every domain with at least minPages of the (url, html)
+        pairs of pages. Only the first maxPages pages of a domain are parsed.
+        """
+        densities = {}
+        for url, html in pages:
+            domain = _host(url)
+            if not domain or len(densities.setdefault(domain, [])) >= maxPages:
+                continue
+            root = (parser or _defaultParser).parse(_removeControlChars(html))
+            densities[domain].append(_textDensities(_calcDensityBottomUp(root)))
+        thresholds = {}
+        for domain, pageDensities in densities.iteritems():
+            if len(pageDensities) >= minPages:
+                threshold = _separatingThreshold([pair for page in pageDensities for pair in page], bins)
+                if threshold != None:
+                    thresholds[domain] = (threshold, len(pageDensities))
+        return cls(thresholds, default)
+
+    def lookup(self, url):
+        """Return: the threshold for the page at url"""
+        host = _host(url)
+        if host not in self._cache:
+            self._cache[host] = self._find(host)
+        return self._cache[host]
+
+    def _find(self, host):
+        domain = host
+        while domain:
+            if domain in self.thresholds:
+                return self.thresholds[domain][0]
+            domain = domain.partition('.')[2]
+        return self.default
+
+    def save(self, fileName):
+        """Write one tab separated domain, threshold and number of pages per line."""
+        f = open(fileName, 'w')
+        for domain, (threshold, pages) in sorted(self.thresholds.iteritems()):
+            f.write('%s\t%r\t%d\n' % (domain, threshold, pages))
+        f.close()
+
+    @classmethod
+    def load(cls, fileName, default=0.5):
+        thresholds = {}
+        f = open(fileName)
+        for line in f:
+            domain, threshold, pages = line.rstrip('\n').split('\t')
+            thresholds[domain] = (float(threshold), int(pages))
+        f.close()
+        return cls(thresholds, default)
+
+
+def _host(url):
+    """The lowercase host name of url, without port and leading 'www.', or '' when url has none."""
+    host = urlparse.urlsplit(url).hostname if url and '//' in url else None
+    if not host:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _textDensities(densDic):
+    """
+    Return: list of (density, text length) for every branch of densDic with text of its
+    own, besides the text of its children
+    """
+    densities = []
+    stack = [densDic]
+    while stack:
+        dic = stack.pop()
+        dens, textLen, totalLen, tree = dic['self']
+        children = dic.get('child', [])
+        ownTextLen = textLen - sum(childDic['self'][1] for childDic in children)
+        if ownTextLen > 0:
+            densities.append((dens, ownTextLen))
+        stack.extend(children)
+    return densities
+
+
+def _separatingThreshold(densities, bins=100):
+    """
+    Otsu's threshold of the (density, weight) pairs of densities, in a histogram of bins
+    between 0 and 1: the lower edge of the high class that maximizes the between class
+    variance.
+
+    Return: the threshold, or None when all the weight is in one bin
+    """
+    histogram = [0.0] * bins
+    for dens, weight in densities:
+        histogram[min(int(dens * bins), bins - 1)] += weight
+    totalWeight = sum(histogram)
+    totalMoment = sum(i * weight for i, weight in enumerate(histogram))
+    best = None
+    bestVariance = 0.0
+    lowWeight = lowMoment = 0.0
+    for i in range(bins - 1):
+        lowWeight += histogram[i]
+        lowMoment += i * histogram[i]
+        highWeight = totalWeight - lowWeight
+        if lowWeight == 0 or highWeight == 0:
+            continue
+        variance = lowWeight * highWeight * (lowMoment / lowWeight - (totalMoment - lowMoment) / highWeight) ** 2
+        if variance > bestVariance:
+            best, bestVariance = i, variance
+    return float(best + 1) / bins if best != None else None
+
+
+class BoilerplateCache(object):
+    """
+    The PageTemplates of the sites of a crawl, for the maxSites sites used last.
+
+    Example of use:
+        >>> cache = BoilerplateCache()
+        >>> for url, html in crawl.iter_html_documents('crawl.warc.gz'):
+        ...     mtTrees = extMainTree(html, template=cache.lookup(url))
+    """
+
+    def __init__(self, maxSites=1000, minSeen=2, learnPages=20):
+        self.minSeen = minSeen
+        self.learnPages = learnPages
+        self.templates = LRUCache(maxSites)
+
+    def lookup(self, url):
+        """Return: the PageTemplate of the host of url, or None when url has no host"""
+        host = _host(url)
+        if not host:
+            return None
+        # With maxSites=0 every page gets a new template, so nothing is learned:
+        return self.templates.lookup(host, self._newTemplate)
+
+    def _newTemplate(self, host):
+        return PageTemplate(self.minSeen, self.learnPages)
+
+
+class PageTemplate(object):
+    """
+    Fingerprints of the boilerplate branches of the pages of one site: menus, footers,
+    sidebars and ad blocks, that the pages of a site share.
+
+    extMainTree teaches the template the branches of every page that hold none of its
+    main text, for the first learnPages pages. A branch is fingerprinted by its path
+    of tags, ids and classes from the root, and a digest of its html. Once a branch was
+    boilerplate in minSeen pages, _calcDensityBottomUp no longer walks it in later pages
+    of the site and takes its lengths from the template, so that the densities of its
+    ancestors stay the same. Only its main text can not be found inside it any more.
+
+    paths: {path: {digest: [number of pages seen, (text length, total length, length in an ancestor)]}}
+    """
+
+    def __init__(self, minSeen=2, learnPages=20):
+        self.minSeen = minSeen
+        self.learnPages = learnPages
+        self.pages = 0
+        self.paths = {}
+        self.rawAttribs = None  # Set by _calcDensityBottomUp for the page being extracted, None if namespaced
+
+    def find(self, path, tree):
+        """Return: the lengths of the branch tree at path if it is known boilerplate, else None"""
+        entry = self.paths[path].get(self._digest(tree))
+        if entry != None and entry[0] >= self.minSeen:
+            return entry[1]
+        return None
+
+    def learn(self, densDic, mainTrees):
+        """Remember the branches of densDic that hold none of mainTrees, for the first learnPages pages."""
+        if self.pages >= self.learnPages or self.rawAttribs == None or not mainTrees:
+            return
+        self.pages += 1
+        self._learn(densDic, '', set(map(id, mainTrees)))
+
+    def _learn(self, densDic, parentPath, mainIds):
+        """Return: True if the branch of densDic holds main text"""
+        tree = densDic['self'][3]
+        if id(tree) in mainIds:
+            return True
+        children = densDic.get('child', [])
+        if not children:
+            return False
+        path = _templatePath(parentPath, tree)
+        holdsMain = [self._learn(childDic, path, mainIds) for childDic in children]
+        if not any(holdsMain):
+            return False
+        for childDic, childHoldsMain in zip(children, holdsMain):
+            if not childHoldsMain:
+                self._remember(childDic['self'][3], path)
+        return True
+
+    def _remember(self, tree, parentPath):
+        tag = tree.tag
+        # Span elements of text tails are not in the tree, and leaves are not worth it:
+        if (not isinstance(tag, basestring) or tree.getparent() == None or
+                tag.lower() in _ignoredTags or tag.lower() == 'br'):
+            return
+        entries = self.paths.setdefault(_templatePath(parentPath, tree), {})
+        digest = self._digest(tree)
+        if digest in entries:
+            entries[digest][0] += 1
+        else:
+            dic, length = _measureDensity(tree, None, True, self.rawAttribs)
+            entries[digest] = [1, (dic['self'][1], dic['self'][2], length)]
+
+    def _digest(self, tree):
+        html = etree.tostring(tree, encoding=unicode, with_tail=False)
+        return hashlib.sha1(('1' if self.rawAttribs else '0') + html.encode('utf-8')).digest()
+
+
+def _templatePath(parentPath, tree):
+    """The path of tree in a PageTemplate: the path of its parent, its tag, id and class."""
+    tag = tree.tag
+    if not isinstance(tag, basestring):
+        return parentPath + '/!'
+    path = parentPath + '/' + tag
+    elementId = tree.get('id')
+    if elementId:
+        path += '#' + elementId
+    elementClass = tree.get('class')
+    if elementClass:
+        path += '.' + elementClass
+    return path
+
+
+def get_text(html, parser=None):
+    return _get_text((parser or _defaultParser).parse(html))
+
+
+def get_tree_text(trees):
+    """
+    Plain text of etree branches, such as the ones of extMainTree, the same as get_text
+    gives for their html without serializing and parsing them again.
+
+    Like _toString, leaves out the tail of a branch when the tail holds text.
+    """
+    return ''.join(_get_text(tree, with_tail=not (tree.tail and tree.tail.strip())) for tree in trees)
+
+
+_tags_to_ignore = frozenset(["head", "style", "script", "noscript", "option"])
+_tags_in_newline = frozenset(["p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "br", "li"])
+
+
+def _get_text(tree, with_tail=True):
+    """
+    Plain text of an etree branch, with a new line after every block tag and without
+    the content of ignored tags, comments and processing instructions.
+
+    The branch is walked with a stack instead of recursion, so that trees of any depth
+    work, and the text is appended to a list that is joined once. A node with children
+    is pushed below them together with its new line and tail, which keeps the nodes
+    on the path alive too: lxml frees a node faster when one of its ancestors is alive.
+    """
+    parts = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.__class__ is tuple:
+            # The new line and tail after the children of a node:
+            parts.append(node[1])
+            continue
+        tag = node.tag
+        tail = node.tail if with_tail or node is not tree else None
+        tag = tag.lower() if isinstance(tag, basestring) else tag
+        if tag in _tags_to_ignore or tag is etree.Comment or tag is etree.PI:
+            # The text after an ignored tag is not part of it:
+            if tail != None:
+                parts.append(tail)
+            continue
+        text = node.text
+        if text != None:
+            parts.append(text)
+        after = '\n' if tag in _tags_in_newline else ''
+        if tail != None:
+            after += tail
+        if len(node):
+            stack.append((node, after))
+            stack.extend(reversed(node))
+        elif after:
+            parts.append(after)
+    return ''.join(parts)
 
-def get_text(html):
-    root = lxml.html.soupparser.fromstring(html)
-    tags_to_ignore = ["head", "style", "script", "noscript", "<built-in function comment>", "option"],
-    tags_in_newline = ["p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "br", "li"]
-
-    def _get_text(tree):
-        text = ''
-        tag = str(tree.tag).lower()
-        if (tag == '<built-in function comment>' or
-                    tag == 'style' or
-                    tag == 'script' or
-                    tag == 'noscript' or
-                    str(tree.tag).lower() in tags_to_ignore):
-            return ''
-        if tree.text != None:
-            text += tree.text
-        for child in tree:
-            text += _get_text(child)
-        if str(tree.tag).lower() in tags_in_newline:
-            text += '\n'
-        if tree.tail != None:
-            text += tree.tail
-        return text
-
-    return _get_text(root)
 
 if __name__ == '__main__':
     import sys, os
+    from crawl import decode_html
 
     if len(sys.argv) < 2:
         print """Extract the main text of a html document.
-  Usage: python text_tools.py %HTML_FILE_NAME% %THRESHOLD%
+  Usage: python text_tools.py [--parser=%PARSER%] %HTML_FILE_NAME% %THRESHOLD%
          %HTML_FILE_NAME% is the file name of target html document
          %THRESHOLD% the text density threshold (Default: 0.5)
+         %PARSER% lxml, recover or soup (Default: soup); the parse times and
+         fallbacks to soup are written in the standard error
   Suggest: English document could choose %THRESHOLD% as 0.5
            Chinese document could try %THRESHOLD% as 0.5 either
            But you should find suitable threshold for specific site yourself!
         """
     else:
-        argv = sys.argv
+        argv = [arg for arg in sys.argv if not arg.startswith('--parser=')]
+        backends = [arg[len('--parser='):] for arg in sys.argv if arg.startswith('--parser=')]
         argv.extend((None, None))
-        fileName, threshold, filter = sys.argv[1:4]
+        fileName, threshold, filter = argv[1:4]
         threshold = threshold == None and 0.5 or float(threshold)
         filter = filter != None and True or False
+        parser = HtmlParser(backends[-1] if backends else PARSER)
         if os.path.exists(fileName):
             f = open(fileName, 'r')
             html = f.read()
             f.close()
-            html = unicode(html, 'gb18030')
-            mtHtml = extMainText(html, threshold, filter)
+            html = decode_html(html)
+            mtTrees = extMainTree(html, threshold, filter, parser)
             # Transfer to plain text:
-            text = get_text(mtHtml)
+            text = get_tree_text(mtTrees)
             print text
+            for name, stats in sorted(parser.report().iteritems()):
+                if stats['parses']:
+                    sys.stderr.write('{0:<8} {1:4d} parses {2:10.4f}s {3:4d} fallbacks ({4:.0%})\n'.format(
+                        name, stats['parses'], stats['seconds'], stats['fallbacks'], stats['fallbackRate']))
         else:
             print "Can not open target html document!"
\ No newline at end of file